@@ -0,0 +1,714 @@
+import collections
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+import orjson
+import psutil
+from flask import Flask, Response, request
+
+from windowslogger import (
+    configure_logger,
+    get_active_window_info,
+    monitor_processes,
+    _get_top_level_window_pids,
+)
+
+# Try to import pandas for vectorized aggregation of large queries
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    print("Warning: 'pandas' not found. Falling back to pure-Python log aggregation.")
+
+# Try to import flask-compress so large JSON responses go out gzipped
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+    print("Warning: 'flask-compress' not found. API responses will be uncompressed.")
+
+app = Flask(__name__)
+if COMPRESS_AVAILABLE:
+    Compress(app)
+
+
+def _json_response(payload, status=200):
+    """
+    Serialize an API payload with orjson instead of Flask's jsonify.
+
+    orjson is considerably faster than stdlib json on the large log/stats
+    payloads and serializes datetime objects natively, so the parsed
+    entries can be passed through as-is.
+    """
+    return Response(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
+# Log file written by the monitor (same default as windowslogger)
+LOG_FILE = os.getenv("AAM_LOGFILE", "app-usage.log")
+
+# Monitor state, controlled via the /api/monitor/* endpoints. All mutations
+# go through _MONITOR_LOCK so concurrent requests (or a threaded WSGI server)
+# can't start two monitor threads or race config updates; _STOP_EVENT gives
+# the monitor loop a clean shutdown signal.
+monitor_active = False
+monitor_thread = None
+monitor_config = {"interval": 2.0, "heartbeat": 300.0}
+_MONITOR_LOCK = threading.Lock()
+_STOP_EVENT = threading.Event()
+
+# Hard cap on entries returned by a single query
+MAX_LOG_LIMIT = 10000
+
+# Incremental tail index over the log file: we remember the byte offset we
+# have parsed up to and a bounded window of parsed entries (oldest first).
+# Each read_logs call then only parses the bytes appended since last time.
+_LOG_CACHE = {
+    "offset": 0,
+    "inode": None,
+    "entries": collections.deque(maxlen=2 * MAX_LOG_LIMIT),
+}
+_LOG_CACHE_LOCK = threading.Lock()
+
+# Memoized read_logs results, keyed on file identity + query args.
+# Dashboard polling repeats the same query every few seconds; when the log
+# file hasn't changed we can return the previous result instead of re-parsing.
+_READ_CACHE = {}
+_READ_CACHE_LOCK = threading.Lock()
+_READ_CACHE_MAX = 32
+
+# One pass over the line: timestamp | level | event_type + rest of message
+_LINE_RE = re.compile(r"^(\S+ \S+) \| (\S+) \| (\S+)(.*)$")
+# key=value pairs in the message tail
+_KV_RE = re.compile(r"(\w+)=(\S+)")
+
+
+def parse_log_line(line):
+    """
+    Parse one "YYYY-MM-DD HH:MM:SS | LEVEL | message" log line.
+
+    Returns a dict with timestamp, level, event_type and the key=value fields
+    from the message, or None if the line doesn't match the expected format.
+    """
+    # Reject blank/garbled lines with a few character probes before paying
+    # for the regex match: every valid line starts "YYYY-MM-DD HH:MM:SS".
+    if len(line) < 22 or line[4] != "-" or line[7] != "-" or line[10] != " " or line[13] != ":":
+        return None
+
+    try:
+        m = _LINE_RE.match(line)
+        if not m:
+            return None
+
+        timestamp_str = m.group(1)
+
+        # The format is fixed ("YYYY-MM-DD HH:MM:SS"), so slice the fields
+        # directly instead of paying for strptime's format interpreter.
+        timestamp = datetime(
+            int(timestamp_str[0:4]),
+            int(timestamp_str[5:7]),
+            int(timestamp_str[8:10]),
+            int(timestamp_str[11:13]),
+            int(timestamp_str[14:16]),
+            int(timestamp_str[17:19]),
+        )
+
+        # JSON messages (active_window events from windowslogger's active
+        # monitor) carry their fields in the payload, not as key=value pairs.
+        event_type = m.group(3)
+        if event_type.startswith("{"):
+            try:
+                data = orjson.loads(event_type + m.group(4))
+            except orjson.JSONDecodeError:
+                return None
+            event_type = data.pop("event_type", "json")
+            fields = data
+        else:
+            fields = dict(_KV_RE.findall(m.group(4)))
+        return {
+            "timestamp": timestamp,
+            "level": m.group(2),
+            "event_type": event_type,
+            "fields": fields,
+            # Lowercased once here so app_filter matching in read_logs doesn't
+            # re-lowercase the same name on every query.
+            "name_lc": str(fields.get("name", "")).lower(),
+        }
+    except Exception:
+        return None
+
+
+def _refresh_log_cache():
+    """
+    Parse any bytes appended to the log file since the last call and fold
+    them into the in-memory entry window. Must be called with
+    _LOG_CACHE_LOCK held.
+
+    Detects rotation/truncation (inode change or size shrink) and rebuilds
+    from the start of the new file.
+    """
+    stat = os.stat(LOG_FILE)
+    if stat.st_ino != _LOG_CACHE["inode"] or stat.st_size < _LOG_CACHE["offset"]:
+        _LOG_CACHE["offset"] = 0
+        _LOG_CACHE["inode"] = stat.st_ino
+        _LOG_CACHE["entries"].clear()
+
+    if stat.st_size == _LOG_CACHE["offset"]:
+        return
+
+    with open(LOG_FILE, "rb") as f:
+        f.seek(_LOG_CACHE["offset"])
+        data = f.read()
+
+    # Only consume complete lines; a partial trailing line is still being
+    # written by the monitor and will be picked up on the next call.
+    if not data.endswith(b"\n"):
+        last_nl = data.rfind(b"\n")
+        if last_nl == -1:
+            return
+        data = data[: last_nl + 1]
+
+    entries = _LOG_CACHE["entries"]
+    for raw in data.split(b"\n"):
+        if not raw:
+            continue
+        parsed = parse_log_line(raw.decode("utf-8", errors="ignore"))
+        if parsed:
+            entries.append(parsed)
+
+    _LOG_CACHE["offset"] += len(data)
+
+
+def read_logs(limit=100, event_filter=None, app_filter=None, since=None):
+    """
+    Return up to 'limit' parsed log entries, newest first.
+
+    Entries are served from an incrementally maintained in-memory window:
+    each call only parses the bytes appended to the log file since the
+    previous call, so steady-state cost is O(new bytes), not O(file size).
+
+    - event_filter: only include entries with this event_type
+    - app_filter: only include entries whose name field contains this string
+    - since: only include entries at or after this datetime
+    """
+    logs = []
+    if not os.path.exists(LOG_FILE):
+        return logs
+
+    # Bucket 'since' to the minute so repeated dashboard polls share a key
+    stat = os.stat(LOG_FILE)
+    since_bucket = since.replace(second=0, microsecond=0).isoformat() if since else None
+    cache_key = (stat.st_mtime_ns, stat.st_size, limit, event_filter, app_filter, since_bucket)
+    with _READ_CACHE_LOCK:
+        cached = _READ_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    app_filter_lc = app_filter.lower() if app_filter else None
+
+    try:
+        with _LOG_CACHE_LOCK:
+            _refresh_log_cache()
+            entries = list(_LOG_CACHE["entries"])
+
+        for parsed in reversed(entries):
+            if len(logs) >= limit:
+                break
+
+            if event_filter and parsed["event_type"] != event_filter:
+                continue
+            if app_filter_lc and app_filter_lc not in parsed["name_lc"]:
+                continue
+            # The log is append-ordered by time, so while scanning newest
+            # first the first entry older than 'since' means every remaining
+            # entry is older too — stop instead of skipping one by one.
+            if since and parsed["timestamp"] < since:
+                break
+
+            logs.append(parsed)
+    except Exception as e:
+        print(f"Error reading logs: {e}")
+        return logs
+
+    with _READ_CACHE_LOCK:
+        if len(_READ_CACHE) >= _READ_CACHE_MAX:
+            _READ_CACHE.clear()
+        _READ_CACHE[cache_key] = logs
+
+    return logs
+
+
+# Above this many entries the pandas aggregation path amortizes its fixed
+# DataFrame-construction overhead and wins over the Python loop.
+_VECTORIZE_THRESHOLD = 5000
+
+
+def _calculate_app_stats_vectorized(logs, include_sessions=False):
+    """
+    Pandas implementation of calculate_app_stats for large windows.
+
+    Pairs the i-th proc_start of a PID with its i-th proc_end via a cumcount
+    merge, so the per-event Python work collapses into a few column
+    operations. Assumes starts and ends alternate per PID; events left
+    unmatched at the window edges may pair differently than the loop path.
+    """
+    chronological = logs[::-1]
+    df = pd.DataFrame({
+        "event": [log["event_type"] for log in chronological],
+        "pid": [log["fields"].get("pid") for log in chronological],
+        "name": [log["fields"].get("name") for log in chronological],
+        "ts": [log["timestamp"] for log in chronological],
+    })
+    df = df[df["pid"].notna() & df["name"].notna()]
+
+    starts = df[df["event"] == "proc_start"].copy()
+    ends = df[df["event"] == "proc_end"].copy()
+    if starts.empty or ends.empty:
+        return []
+
+    starts["seq"] = starts.groupby("pid").cumcount()
+    ends["seq"] = ends.groupby("pid").cumcount()
+    merged = starts.merge(ends, on=["pid", "seq"], suffixes=("_start", "_end"))
+    merged["duration_sec"] = (merged["ts_end"] - merged["ts_start"]).dt.total_seconds()
+    merged = merged[merged["duration_sec"] >= 0]
+
+    stats = []
+    for app_name, group in merged.groupby("name_end", sort=False):
+        durations = group["duration_sec"]
+        total_duration = float(durations.sum())
+        entry = {
+            "name": app_name,
+            "session_count": len(group),
+            "total_duration_sec": round(total_duration, 2),
+            "avg_duration_sec": round(total_duration / len(group), 2),
+        }
+        if include_sessions:
+            # Native types only: orjson rejects the numpy.float64 durations
+            # (and pd.Timestamp on some versions) these columns yield.
+            entry["sessions"] = [
+                {"start": s.to_pydatetime(), "end": e.to_pydatetime(), "duration_sec": float(d)}
+                for s, e, d in zip(group["ts_start"], group["ts_end"], durations)
+            ]
+        stats.append(entry)
+
+    stats.sort(key=lambda s: s["total_duration_sec"], reverse=True)
+    return stats
+
+
+def calculate_app_stats(logs, include_sessions=False):
+    """
+    Pair proc_start/proc_end events into sessions and aggregate them per app.
+
+    Expects logs newest-first (as returned by read_logs) and replays them in
+    chronological order. Large windows are aggregated with pandas when it is
+    available. Per-session detail is only built (and serialized) when
+    include_sessions is True; dashboards usually only need the totals.
+    """
+    if PANDAS_AVAILABLE and len(logs) >= _VECTORIZE_THRESHOLD:
+        return _calculate_app_stats_vectorized(logs, include_sessions=include_sessions)
+
+    # Sessions are kept as (start, end, duration_sec) tuples while scanning;
+    # dicts are only materialized once per app in the final stats list.
+    app_sessions = collections.defaultdict(list)
+
+    # Open sessions live in a small direct-mapped slot array indexed by
+    # pid & 511 — one array index and a pid compare instead of dict hashing
+    # for the common case — with a spill dict for colliding/odd PIDs.
+    # Bounded memory even when proc_end events are missing from the window.
+    active_slots = [None] * 512
+    overflow = {}
+
+    for log in reversed(logs):
+        event_type = log["event_type"]
+        fields = log["fields"]
+        pid = fields.get("pid")
+        app_name = fields.get("name")
+
+        if not pid or not app_name:
+            continue
+
+        if event_type == "proc_start":
+            entry = (pid, log["timestamp"])
+            if pid.isdigit():
+                slot = int(pid) & 511
+                existing = active_slots[slot]
+                if existing is None or existing[0] == pid:
+                    active_slots[slot] = entry
+                else:
+                    overflow[pid] = entry
+            else:
+                overflow[pid] = entry
+        elif event_type == "proc_end":
+            session = None
+            if pid.isdigit():
+                slot = int(pid) & 511
+                existing = active_slots[slot]
+                if existing is not None and existing[0] == pid:
+                    session = existing
+                    active_slots[slot] = None
+            if session is None:
+                session = overflow.pop(pid, None)
+            if session is None:
+                continue
+            duration_sec = (log["timestamp"] - session[1]).total_seconds()
+            if duration_sec < 0:
+                continue
+            app_sessions[app_name].append((session[1], log["timestamp"], duration_sec))
+
+    stats = []
+    for app_name, sessions in app_sessions.items():
+        total_duration = sum(s[2] for s in sessions)
+        entry = {
+            "name": app_name,
+            "session_count": len(sessions),
+            "total_duration_sec": round(total_duration, 2),
+            "avg_duration_sec": round(total_duration / len(sessions), 2),
+        }
+        if include_sessions:
+            entry["sessions"] = [
+                {"start": s[0], "end": s[1], "duration_sec": s[2]} for s in sessions
+            ]
+        stats.append(entry)
+
+    stats.sort(key=lambda s: s["total_duration_sec"], reverse=True)
+    return stats
+
+
+def usage_summary(logs):
+    """
+    Build a high-level summary (event counts, unique apps) over parsed logs.
+    """
+    starts = 0
+    ends = 0
+    unique_apps = set()
+    # Single pass: bump the right counter and collect the app name as we go
+    for log in logs:
+        event_type = log["event_type"]
+        if event_type == "proc_start":
+            starts += 1
+        elif event_type == "proc_end":
+            ends += 1
+        name = log["fields"].get("name")
+        if name:
+            unique_apps.add(name)
+
+    return {
+        "total_events": len(logs),
+        "proc_starts": starts,
+        "proc_ends": ends,
+        "unique_apps": sorted(unique_apps),
+        "unique_app_count": len(unique_apps),
+    }
+
+
+# psutil.Process objects cached across requests, keyed by PID. Reusing the
+# objects keeps psutil's internal state (e.g. cpu_percent baselines) alive
+# between polls; create_time is stored to detect PID reuse.
+_PROC_CACHE = {}
+_PROC_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_process(pid):
+    """
+    Return a cached psutil.Process for this PID, validating against PID reuse.
+
+    Raises psutil.NoSuchProcess if the process is gone.
+    """
+    with _PROC_CACHE_LOCK:
+        cached = _PROC_CACHE.get(pid)
+    if cached is not None:
+        proc, create_time = cached
+        try:
+            if proc.create_time() == create_time:
+                return proc
+        except psutil.NoSuchProcess:
+            pass
+        with _PROC_CACHE_LOCK:
+            _PROC_CACHE.pop(pid, None)
+
+    proc = psutil.Process(pid)
+    with _PROC_CACHE_LOCK:
+        _PROC_CACHE[pid] = (proc, proc.create_time())
+    return proc
+
+
+def _prune_proc_cache(live_pids):
+    """Drop cache entries for PIDs that are no longer running."""
+    with _PROC_CACHE_LOCK:
+        for pid in list(_PROC_CACHE):
+            if pid not in live_pids:
+                del _PROC_CACHE[pid]
+
+
+def get_running_apps():
+    """
+    Return info about processes that currently own visible top-level windows.
+    """
+    gui_pids = _get_top_level_window_pids()
+    apps = []
+    # Iterate the small set of windowed PIDs directly instead of walking the
+    # full process table with process_iter; oneshot() batches the per-process
+    # attribute reads into one underlying query.
+    for pid in gui_pids:
+        try:
+            p = _get_cached_process(pid)
+            with p.oneshot():
+                create_time = p.create_time()
+                apps.append({
+                    "pid": pid,
+                    "name": p.name(),
+                    "exe": p.exe(),
+                    "username": p.username(),
+                    "started_at": datetime.fromtimestamp(create_time).isoformat() if create_time else None,
+                    "memory_mb": round(p.memory_info().rss / (1024 * 1024), 2),
+                })
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    _prune_proc_cache(gui_pids)
+    apps.sort(key=lambda a: a["memory_mb"] or 0, reverse=True)
+    return apps
+
+
+# Static system constants, computed once at import: core count and total
+# memory don't change while the server runs, so don't re-query them per request.
+_GB = 1 << 30
+_CPU_COUNT = psutil.cpu_count()
+_MEM_TOTAL_GB = round(psutil.virtual_memory().total / _GB, 2)
+
+# Latest system-wide CPU percentage, refreshed by a background sampler so
+# request handlers never block on psutil.cpu_percent(interval=...).
+_LATEST_CPU = 0.0
+
+
+def _cpu_sampler_loop():
+    global _LATEST_CPU
+    while True:
+        # interval=1.0 blocks for the sampling window, but only this thread
+        _LATEST_CPU = psutil.cpu_percent(interval=1.0)
+
+
+_cpu_sampler = threading.Thread(target=_cpu_sampler_loop, daemon=True)
+_cpu_sampler.start()
+
+
+def get_system_health():
+    """
+    Return current CPU/memory usage of the machine.
+    """
+    memory = psutil.virtual_memory()
+    return {
+        "cpu_percent": _LATEST_CPU,
+        "cpu_count": _CPU_COUNT,
+        "memory_percent": memory.percent,
+        "memory_used_gb": round(memory.used / _GB, 2),
+        "memory_total_gb": _MEM_TOTAL_GB,
+    }
+
+
+def _parse_query_args():
+    """Parse the common query args shared by the log/stats endpoints."""
+    limit = min(int(request.args.get("limit", 100)), MAX_LOG_LIMIT)
+    event_filter = request.args.get("event")
+    app_filter = request.args.get("app")
+    since = None
+    hours = request.args.get("hours")
+    if hours:
+        since = datetime.now() - timedelta(hours=float(hours))
+    return limit, event_filter, app_filter, since
+
+
+@app.route("/api/logs", methods=["GET"])
+def api_logs():
+    try:
+        limit, event_filter, app_filter, since = _parse_query_args()
+        logs = read_logs(limit=limit, event_filter=event_filter, app_filter=app_filter, since=since)
+        # Optional projection: ?fields=timestamp,event_type,name returns only
+        # those keys per entry, so clients that print a few columns don't
+        # download the full records.
+        fields_arg = request.args.get("fields")
+        if fields_arg:
+            fields = [f for f in fields_arg.split(",") if f]
+            logs = [{k: entry[k] for k in fields if k in entry} for entry in logs]
+        return _json_response({"success": True, "count": len(logs), "data": logs})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/stats/apps", methods=["GET"])
+def api_app_stats():
+    try:
+        _, _, app_filter, since = _parse_query_args()
+        include_sessions = request.args.get("include_sessions", "0") == "1"
+        logs = read_logs(limit=MAX_LOG_LIMIT, app_filter=app_filter, since=since)
+        stats = calculate_app_stats(logs, include_sessions=include_sessions)
+        return _json_response({"success": True, "count": len(stats), "data": stats})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/stats/summary", methods=["GET"])
+def api_summary():
+    try:
+        _, _, _, since = _parse_query_args()
+        logs = read_logs(limit=MAX_LOG_LIMIT, since=since)
+        return _json_response({"success": True, "data": usage_summary(logs)})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/apps/running", methods=["GET"])
+def api_running_apps():
+    try:
+        apps = get_running_apps()
+        # ?limit=N trims the payload server-side for clients that only show
+        # the first few entries.
+        limit = request.args.get("limit", type=int)
+        if limit is not None and limit > 0:
+            apps = apps[:limit]
+        return _json_response({"success": True, "count": len(apps), "data": apps})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/apps/active", methods=["GET"])
+def api_active_app():
+    try:
+        pid, name, title = get_active_window_info()
+        if pid is None:
+            return _json_response({"success": True, "data": None})
+
+        data = {"pid": pid, "name": name, "window_title": title}
+        try:
+            proc = _get_cached_process(pid)
+            with proc.oneshot():
+                data["exe"] = proc.exe()
+                data["username"] = proc.username()
+                # Non-blocking: compares against the last call on this cached
+                # Process object instead of sleeping 100 ms in the handler.
+                data["cpu_percent"] = proc.cpu_percent(interval=None)
+                data["memory_mb"] = round(proc.memory_info().rss / (1024 * 1024), 2)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+        return _json_response({"success": True, "data": data})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/stats/overview", methods=["GET"])
+def api_overview():
+    """
+    Aggregate dashboard endpoint: everything a client needs in one request.
+
+    Dashboards previously composed this from six endpoints, paying a round
+    trip per section; here the windowed log scan is done once and shared by
+    the summary and per-app stats.
+    """
+    try:
+        _, _, app_filter, since = _parse_query_args()
+        logs = read_logs(limit=MAX_LOG_LIMIT, app_filter=app_filter, since=since)
+
+        pid, name, title = get_active_window_info()
+        active = {"pid": pid, "name": name, "window_title": title} if pid is not None else None
+
+        running = get_running_apps()
+        data = {
+            "system_health": get_system_health(),
+            "active_app": active,
+            "running_apps": running[:10],
+            "recent_logs": logs[:20],
+            "summary": usage_summary(logs),
+            "app_stats": calculate_app_stats(logs),
+        }
+        return _json_response({"success": True, "data": data})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+@app.route("/api/system/health", methods=["GET"])
+def api_system_health():
+    try:
+        return _json_response({"success": True, "data": get_system_health()})
+    except Exception as e:
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+
+def _monitor_loop():
+    global monitor_active
+    listener = None
+    try:
+        logger, listener = configure_logger(LOG_FILE)
+        # Run the process monitor: its proc_start/proc_end key=value output
+        # is what parse_log_line and calculate_app_stats are built around,
+        # so the stats endpoints see the data this monitor produces.
+        monitor_processes(
+            monitor_config["interval"],
+            logger,
+            stop_event=_STOP_EVENT,
+        )
+    except Exception as e:
+        print(f"Error in monitor loop: {e}")
+    finally:
+        if listener is not None:
+            listener.stop()
+        with _MONITOR_LOCK:
+            monitor_active = False
+
+
+@app.route("/api/monitor/start", methods=["POST"])
+def start_monitor():
+    global monitor_active, monitor_thread
+    with _MONITOR_LOCK:
+        if monitor_active:
+            return _json_response({"success": False, "message": "Monitor is already running"}, status=400)
+        monitor_active = True
+        _STOP_EVENT.clear()
+        monitor_thread = threading.Thread(target=_monitor_loop, daemon=True)
+        monitor_thread.start()
+    return _json_response({"success": True, "message": "Monitor started"})
+
+
+@app.route("/api/monitor/stop", methods=["POST"])
+def stop_monitor():
+    with _MONITOR_LOCK:
+        if not monitor_active:
+            return _json_response({"success": False, "message": "Monitor is not running"}, status=400)
+        _STOP_EVENT.set()
+        thread = monitor_thread
+    if thread:
+        thread.join(timeout=5)
+    return _json_response({"success": True, "message": "Monitor stopped"})
+
+
+@app.route("/api/monitor/config", methods=["GET", "POST"])
+def monitor_configuration():
+    with _MONITOR_LOCK:
+        if request.method == "POST":
+            data = request.get_json() or {}
+            if "interval" in data:
+                monitor_config["interval"] = float(data["interval"])
+            if "heartbeat" in data:
+                monitor_config["heartbeat"] = float(data["heartbeat"])
+        config = dict(monitor_config)
+    return _json_response({"success": True, "data": config})
+
+
+@app.route("/", methods=["GET"])
+def health_check():
+    return "Stats API is running!"
+
+
+if __name__ == "__main__":
+    # Serve with waitress instead of the single-threaded Werkzeug dev server
+    # so polling clients can issue concurrent requests; fall back to the dev
+    # server if waitress isn't installed.
+    try:
+        from waitress import serve
+        print("Serving stats API on http://0.0.0.0:5000 (waitress, 8 threads)")
+        serve(app, host="0.0.0.0", port=5000, threads=8)
+    except ImportError:
+        print("Warning: 'waitress' not found. Falling back to Flask dev server.")
+        app.run(debug=True, host="0.0.0.0", port=5000)
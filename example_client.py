@@ -0,0 +1,156 @@
+"""
+Example client for the local stats API server (api_server.py).
+
+Start the server first:
+    python api_server.py
+
+Then run this script to exercise every endpoint and print a small
+text dashboard.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = "http://127.0.0.1:5000"
+
+# One Session for every call: the underlying TCP connection (and TLS state,
+# when the server is remote) is pooled and reused instead of re-established
+# per endpoint.
+session = requests.Session()
+
+
+def _get(path, params=None):
+    """GET a JSON endpoint and return its 'data' payload (or None on error)."""
+    try:
+        resp = session.get(f"{BASE_URL}{path}", params=params, timeout=10)
+        payload = resp.json()
+        if not payload.get("success", True):
+            print(f"Error from {path}: {payload.get('error')}")
+            return None
+        return payload.get("data", payload)
+    except requests.RequestException as e:
+        print(f"Error calling {path}: {e}")
+        return None
+
+
+def health_check():
+    """Check that the server is up. The root route returns plain text, so
+    probe it directly instead of going through the JSON helper."""
+    try:
+        resp = session.get(f"{BASE_URL}/", timeout=10)
+        return resp.ok
+    except requests.RequestException as e:
+        print(f"Error calling /: {e}")
+        return False
+
+
+def get_system_health():
+    """CPU / memory / disk snapshot."""
+    return _get("/api/system/health")
+
+
+def get_running_apps(limit=10):
+    """GUI apps currently running (trimmed server-side to `limit`)."""
+    return _get("/api/apps/running", params={"limit": limit})
+
+
+def get_active_app():
+    """The current foreground application."""
+    return _get("/api/apps/active")
+
+
+def get_logs(limit=20):
+    """Most recent parsed log entries, projected to the printed columns."""
+    return _get("/api/logs", params={"limit": limit,
+                                     "fields": "timestamp,event_type,fields"})
+
+
+def get_summary(hours=24):
+    """Usage summary over the last N hours."""
+    return _get("/api/stats/summary", params={"hours": hours})
+
+
+def get_app_stats(hours=24):
+    """Per-app session statistics over the last N hours."""
+    return _get("/api/stats/apps", params={"hours": hours})
+
+
+def get_overview(hours=24):
+    """Everything the dashboard needs in a single request."""
+    return _get("/api/stats/overview", params={"hours": hours})
+
+
+def main():
+    print("=== Active Apps Monitor — Example Client ===\n")
+
+    if not health_check():
+        print("Server not reachable. Is api_server.py running?")
+        return
+
+    # Prefer the aggregate endpoint: one round trip and one server-side log
+    # scan for the whole dashboard. Fall back to fanning out the individual
+    # endpoints concurrently against an older server.
+    overview = get_overview(hours=24)
+    if overview is not None:
+        results = {
+            "health": overview.get("system_health"),
+            "active": overview.get("active_app"),
+            "apps": overview.get("running_apps"),
+            "logs": overview.get("recent_logs"),
+            "summary": overview.get("summary"),
+            "stats": overview.get("app_stats"),
+        }
+    else:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = {
+                "health": executor.submit(get_system_health),
+                "active": executor.submit(get_active_app),
+                "apps": executor.submit(get_running_apps, 10),
+                "logs": executor.submit(get_logs, 20),
+                "summary": executor.submit(get_summary, 24),
+                "stats": executor.submit(get_app_stats, 24),
+            }
+            results = {name: f.result() for name, f in futures.items()}
+
+    print("--- System Health ---")
+    health = results["health"]
+    if health:
+        print(f"CPU: {health.get('cpu_percent')}%  "
+              f"Memory: {health.get('memory_percent')}% "
+              f"({health.get('memory_used_gb')}/{health.get('memory_total_gb')} GB)")
+
+    print("\n--- Active App ---")
+    active = results["active"]
+    if active:
+        print(f"{active.get('name')} (pid={active.get('pid')}) — {active.get('window_title')}")
+
+    print("\n--- Running Apps (first 10) ---")
+    apps = results["apps"]
+    if apps:
+        for app in apps[:10]:
+            print(f"  {app.get('name')} (pid={app.get('pid')})")
+
+    print("\n--- Recent Logs ---")
+    logs = results["logs"]
+    if logs:
+        for entry in logs:
+            print(f"  {entry.get('timestamp')} {entry.get('event_type')} "
+                  f"{entry.get('fields', {}).get('name', '')}")
+
+    print("\n--- Usage Summary (24h) ---")
+    summary = results["summary"]
+    if summary:
+        print(f"Events: {summary.get('total_events')}  "
+              f"Apps seen: {summary.get('unique_app_count')}")
+
+    print("\n--- App Stats (24h) ---")
+    stats = results["stats"]
+    if stats:
+        for app in stats[:10]:
+            print(f"  {app.get('name')}: {app.get('session_count')} sessions, "
+                  f"{app.get('total_duration_sec')}s total")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 
 function AdminDashboard({ token, handleLogout }) {
-  const [adminReports, setAdminReports] = useState([]);
+  const [adminReports, setAdminReports] = useState({ contents: [], statuses: [] });
   const [error, setError] = useState('');
   const [selectedUserName, setSelectedUserName] = useState(() => localStorage.getItem('admin_selected_user_name') || '');
   const [selectedUserId, setSelectedUserId] = useState(() => localStorage.getItem('admin_selected_user_id') || '');
@@ -28,7 +28,7 @@ function AdminDashboard({ token, handleLogout }) {
       
       if (response.ok) {
         const data = await response.json();
-        setAdminReports(data);
+        setAdminReports({ contents: data.contents || [], statuses: data.statuses || [] });
       } else {
         if (response.status === 401 || response.status === 403) {
           handleLogout();
@@ -76,7 +76,7 @@ function AdminDashboard({ token, handleLogout }) {
       
       {error && <p style={{ color: 'red' }}>{error}</p>}
 
-      {adminReports.length === 0 ? (
+      {adminReports.contents.length === 0 ? (
          <p>No reports available or no logs processed yet.</p>
       ) : (
          <div style={{ overflowX: 'auto' }}>
@@ -88,12 +88,12 @@ function AdminDashboard({ token, handleLogout }) {
                </tr>
              </thead>
              <tbody>
-               {adminReports.map((report, index) => (
+               {adminReports.contents.map((content, index) => (
                  <tr key={index} style={{ borderBottom: '1px solid #eee' }}>
-                   <td style={{ padding: '10px', color: report.status === 'Danger' ? '#e03131' : '#2f9e44', fontWeight: 'bold' }}>
-                     {report.status}
+                   <td style={{ padding: '10px', color: adminReports.statuses[index] === 'Danger' ? '#e03131' : '#2f9e44', fontWeight: 'bold' }}>
+                     {adminReports.statuses[index]}
                    </td>
-                   <td style={{ padding: '10px', fontFamily: 'monospace' }}>{report.content}</td>
+                   <td style={{ padding: '10px', fontFamily: 'monospace' }}>{content}</td>
                  </tr>
                ))}
              </tbody>
@@ -1,13 +1,14 @@
 import sys
 import os
-import pandas as pd
+from collections import deque
+
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
 # Ensure we can import from server package
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from server.shared_utils import get_container_client, download_and_parse_log, parse_log_to_df
+from server.shared_utils import get_container_client, load_log_df, summarize_df
 from server.gemini_service import GeminiService
 
 load_dotenv()
@@ -22,15 +23,18 @@ def list_user_logs(user_id: str, limit: int = 20) -> str:
     """
     try:
         container = get_container_client()
-        blobs = []
+        # Ring buffer instead of a full list: only the last `limit` names are
+        # wanted, so memory stays O(limit) however many blobs the user has.
+        recent = deque(maxlen=limit)
+        total = 0
         for b in container.list_blobs(name_starts_with=f"{user_id}/"):
-            blobs.append(b.name)
+            recent.append(b.name)
+            total += 1
         
-        if not blobs:
+        if not recent:
             return f"No logs found for user: {user_id}"
         
-        recent_blobs = blobs[-limit:]
-        return f"Found {len(blobs)} logs for {user_id} (showing last {len(recent_blobs)}):\n" + "\n".join(recent_blobs)
+        return f"Found {total} logs for {user_id} (showing last {len(recent)}):\n" + "\n".join(recent)
     except Exception as e:
         return f"Error listing logs: {str(e)}"
 
@@ -40,39 +44,12 @@ def analyze_productivity(blob_name: str) -> str:
     Downloads a specific zipped log file, parses the activity, and returns a productivity summary.
     """
     try:
-        log_content = download_and_parse_log(blob_name)
-        df = parse_log_to_df(log_content)
+        df = load_log_df(blob_name)
 
         if df.empty:
             return "No process events found in the log."
-        
-        # Basic Analysis
-        start_time = df['timestamp'].min()
-        end_time = df['timestamp'].max()
-        duration = end_time - start_time
-        app_counts = df[df['event'] == 'start']['name'].value_counts().to_dict()
-        browser_pages = df[df['page'] != ""]['page'].unique()
-        urls = df[df['url'] != ""]['url'].unique()
-        
-        summary = f"""
-Productivity Analysis for {blob_name}
--------------------------------------
-Session Start: {start_time}
-Session End:   {end_time}
-Total Duration: {duration}
-
-Top Applications Launched:
-{pd.Series(app_counts).to_markdown()}
-
-Browser Pages Visited:
-{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
-
-URLs Visited:
-{', '.join(urls) if len(urls) > 0 else "None detected"}
 
-Raw Event Count: {len(df)}
-"""
-        return summary
+        return summarize_df(df, blob_name)
 
     except Exception as e:
         return f"Error analyzing blob: {str(e)}"
@@ -1,11 +1,19 @@
 import os
 import sys
+import hashlib
 import io
+import re
+import tempfile
 import time
 import zipfile
 import logging
 import json
+import orjson
 import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 import google.generativeai as genai
 from datetime import datetime
@@ -21,44 +29,174 @@ AZURE_CONNECTION_STRING = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
 AZURE_CONTAINER_NAME = os.getenv('AZURE_CONTAINER_NAME', 'app-monitor-logs')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Configure Gemini
+# Schema for the productivity report. Passed as a structured-output config so
+# Gemini returns raw JSON in this shape -- no markdown fences to strip and no
+# malformed-JSON retries.
+_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "is_productive": {"type": "boolean"},
+        "is_dangerous": {"type": "boolean"},
+        "productivity_reason": {"type": "string"},
+        "apps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "category": {"type": "string"},
+                    "is_productive": {"type": "boolean"},
+                    "is_dangerous": {"type": "boolean"},
+                    "productivity_reason": {"type": "string"},
+                },
+                "required": ["name", "is_productive", "is_dangerous"],
+            },
+        },
+    },
+    "required": ["is_productive", "is_dangerous", "productivity_reason", "apps"],
+}
+
+# Configure Gemini; the model handle is reusable and thread-safe, so build
+# it once instead of per report.
+_gemini_model = None
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
+    _gemini_model = genai.GenerativeModel(
+        'gemini-2.5-flash',
+        generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": _REPORT_SCHEMA,
+        },
+    )
 else:
     print("Warning: GEMINI_API_KEY not found. AI predictions will be disabled.", file=sys.stderr)
 
 # Initialize MCP Server
 mcp = FastMCP("ProductivityMonitor")
 
+# Legacy-format patterns for the vectorized parser, compiled once at import
+# instead of per parse_log_to_df call. proc_title is the deferred browser
+# title follow-up to proc_start; its rows carry the page column.
+_PROC_EVENT_RE = re.compile(r"proc_(start|end|title)")
+_KV_RE = re.compile(r"(\w+)=(\S+)")
+
+# Path-separator sanitization for report/cache filenames, one translate
+# table instead of chained str.replace allocations per blob.
+_SAFE_TRANS = str.maketrans({'/': '_', '\\': '_'})
+
+
+def _safe_report_name(blob_name: str) -> str:
+    """Map a blob name to its report filename."""
+    safe = blob_name.translate(_SAFE_TRANS)
+    return safe[:-4] + '.json' if safe.endswith('.zip') else safe + '.json'
+
+# The container client is a process-wide singleton: building a fresh
+# BlobServiceClient per call re-ran TLS/connection-pool setup every time,
+# which the auto loop paid for on every poll and blob.
+_container_client = None
+_container_client_lock = threading.Lock()
+
+
 def get_container_client():
-    if not AZURE_CONNECTION_STRING:
-        raise ValueError("AZURE_STORAGE_CONNECTION_STRING is not set")
-    service = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
-    return service.get_container_client(AZURE_CONTAINER_NAME)
+    global _container_client
+    if _container_client is None:
+        with _container_client_lock:
+            if _container_client is None:
+                if not AZURE_CONNECTION_STRING:
+                    raise ValueError("AZURE_STORAGE_CONNECTION_STRING is not set")
+                service = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
+                _container_client = service.get_container_client(AZURE_CONTAINER_NAME)
+    return _container_client
 
 def download_and_parse_log(blob_name: str) -> str:
     """Helper to download and parse log content from Azure Blob."""
     container = get_container_client()
     blob_client = container.get_blob_client(blob_name)
     
-    # Download blob into memory
-    download_stream = blob_client.download_blob()
-    zip_data = io.BytesIO(download_stream.readall())
-    
-    log_content = ""
+    # Stream the blob into a spooled temp file: small blobs stay in memory,
+    # large ones spill to disk instead of holding blob bytes + zip bytes +
+    # decoded text in RAM at once (readall into BytesIO doubled peak memory).
+    # max_concurrency lets the SDK fetch large blobs as parallel ranged GETs,
+    # which is the only stage of this pipeline that can actually overlap: the
+    # zip central directory sits at the end of the archive, so decompression
+    # cannot start until the download finishes.
+    download_stream = blob_client.download_blob(max_concurrency=4)
     
-    # Extract the zip
-    with zipfile.ZipFile(zip_data) as z:
-        file_list = z.namelist()
-        target_file = next((f for f in file_list if f.endswith('.log')), file_list[0] if file_list else None)
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as zip_data:
+        download_stream.readinto(zip_data)
+        zip_data.seek(0)
         
-        if not target_file:
-            raise ValueError("No log file found inside the zip.")
-            
-        with z.open(target_file) as f:
-            log_content = f.read().decode('utf-8', errors='ignore')
-            
-    return log_content
+        # Extract the zip
+        with zipfile.ZipFile(zip_data) as z:
+            # Scan the central directory lazily and stop at the first .log
+            # entry; opening by ZipInfo also skips a second name lookup.
+            target = next((zi for zi in z.infolist() if zi.filename.endswith('.log')), None)
+            if target is None:
+                infos = z.infolist()
+                if not infos:
+                    raise ValueError("No log file found inside the zip.")
+                target = infos[0]
+
+            with z.open(target) as f:
+                return f.read().decode('utf-8', errors='ignore')
+
+# Parsed-DataFrame cache: entries are keyed by blob name and validated
+# against the blob's current ETag (a cheap properties call), so repeat
+# analyses of an unchanged blob skip the download + unzip + parse entirely.
+# A parquet copy in .cache/ lets the cache survive restarts. The parser
+# version is folded into the validation tag: cached frames are whatever
+# parse_log_to_df produced at the time, so a parser fix has to invalidate
+# them — an unchanged blob (same ETag) would otherwise serve stale output
+# forever. Bump on any change to parse_log_to_df's behavior.
+_PARSER_VERSION = 2
+_DF_CACHE_DIR = ".cache"
+_df_cache = {}
+_DF_CACHE_MAX = 128
+
+
+def _remember_df(blob_name: str, etag: str, df: pd.DataFrame):
+    if len(_df_cache) >= _DF_CACHE_MAX:
+        _df_cache.clear()
+    _df_cache[blob_name] = (etag, df)
+
+
+def _load_df(blob_name: str) -> pd.DataFrame:
+    """Return the parsed DataFrame for a blob, cached by (blob_name, ETag, parser version)."""
+    container = get_container_client()
+    blob_client = container.get_blob_client(blob_name)
+    cache_tag = f"{blob_client.get_blob_properties().etag}|v{_PARSER_VERSION}"
+
+    cached = _df_cache.get(blob_name)
+    if cached is not None and cached[0] == cache_tag:
+        return cached[1]
+
+    safe_name = blob_name.translate(_SAFE_TRANS)
+    parquet_path = os.path.join(_DF_CACHE_DIR, safe_name + ".parquet")
+    etag_path = parquet_path + ".etag"
+    if os.path.exists(parquet_path) and os.path.exists(etag_path):
+        try:
+            with open(etag_path, 'r', encoding='utf-8') as f:
+                if f.read().strip() == cache_tag:
+                    df = pd.read_parquet(parquet_path)
+                    _remember_df(blob_name, cache_tag, df)
+                    return df
+        except Exception as e:
+            print(f"Warning: could not read cached parquet: {e}", file=sys.stderr)
+
+    log_content = download_and_parse_log(blob_name)
+    df = parse_log_to_df(log_content)
+
+    try:
+        os.makedirs(_DF_CACHE_DIR, exist_ok=True)
+        df.to_parquet(parquet_path)
+        with open(etag_path, 'w', encoding='utf-8') as f:
+            f.write(cache_tag)
+    except Exception as e:
+        print(f"Warning: could not write parquet cache: {e}", file=sys.stderr)
+
+    _remember_df(blob_name, cache_tag, df)
+    return df
+
 
 def read_local_log(file_path: str) -> str:
     """Helper to read a local log file."""
@@ -66,82 +204,171 @@ def read_local_log(file_path: str) -> str:
         return f.read()
 
 def parse_log_to_df(log_content: str) -> pd.DataFrame:
-    """Helper to parse raw log text into a DataFrame."""
-    data = []
-    lines = log_content.splitlines()
-    
-    for line in lines:
-        try:
-            # Fast split on first two pipes
-            parts = line.split(" | ", 2)
-            if len(parts) < 3:
-                continue
-                
-            timestamp_str = parts[0]
-            message = parts[2]
-            
-            # Fast timestamp parsing (assuming fixed format YYYY-MM-DD HH:MM:SS)
+    """Helper to parse raw log text into a DataFrame.
+
+    Parsing is vectorized: the line split, timestamp conversion and legacy
+    key=value extraction all run as pandas column operations instead of a
+    Python loop over every line, which dominates CPU time on large logs.
+    Only orjson.loads still runs per JSON line.
+    """
+    lines = pd.Series(log_content.splitlines(), dtype="object")
+    if lines.empty:
+        return pd.DataFrame()
+
+    # One split into (timestamp, level, message) columns. regex=False: the
+    # pattern is a literal delimiter; as a regex the "|" is alternation and
+    # the split lands on every space.
+    parts = lines.str.split(" | ", n=2, expand=True, regex=False)
+    if parts.shape[1] < 3:
+        return pd.DataFrame()
+
+    ts = pd.to_datetime(parts[0], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    msg = parts[2]
+    valid = ts.notna() & msg.notna()
+    ts = ts[valid]
+    msg = msg[valid]
+    if msg.empty:
+        return pd.DataFrame()
+
+    frames = []
+
+    # New format: JSON payloads (active_window events). A first-byte compare
+    # gates the parse so legacy lines never reach json.loads (and never pay
+    # for its exception path).
+    json_mask = msg.str[0].eq("{")
+    if json_mask.any():
+        json_rows = []
+        json_index = []
+        for idx, m in msg[json_mask].items():
             try:
-                # timestamp_str is "2025-12-13 10:00:00"
-                ts = datetime(
-                    int(timestamp_str[0:4]),
-                    int(timestamp_str[5:7]),
-                    int(timestamp_str[8:10]),
-                    int(timestamp_str[11:13]),
-                    int(timestamp_str[14:16]),
-                    int(timestamp_str[17:19])
-                )
-            except (ValueError, IndexError):
+                json_data = orjson.loads(m)
+            except orjson.JSONDecodeError:
                 continue
-            
-            # Try parsing as JSON first (new format)
-            # Optimization: Check if it looks like JSON before trying to parse
-            if message.strip().startswith('{'):
-                try:
-                    json_data = json.loads(message)
-                    # Handle active_window event
-                    if json_data.get("event_type") == "active_window":
-                        data.append({
-                            "timestamp": ts,
-                            "event": "active",
-                            "pid": json_data.get("pid"),
-                            "name": json_data.get("name"),
-                            "exe": json_data.get("exe", ""),
-                            "page": json_data.get("page_title", ""),
-                            "window_title": json_data.get("window_title", ""),
-                            "url": json_data.get("url", "")
-                        })
-                        continue
-                except json.JSONDecodeError:
-                    pass
-            
-            # Fallback to old format parsing
-            if "proc_start" in line or "proc_end" in line:
-                attr_dict = {}
-                for part in message.split(" "):
-                    if "=" in part:
-                        k, v = part.split("=", 1)
-                        attr_dict[k] = v
-                
-                event_type = "start" if "proc_start" in line else "end"
-                
-                data.append({
-                    "timestamp": ts,
-                    "event": event_type,
-                    "pid": attr_dict.get("pid"),
-                    "name": attr_dict.get("name"),
-                    "exe": attr_dict.get("exe"),
-                    "page": attr_dict.get("page", ""),
-                    "window_title": attr_dict.get("window_title", ""),
-                    "url": ""
-                })
-        except Exception:
-            continue
-                
-    if not data:
+            if json_data.get("event_type") == "active_window":
+                json_rows.append(json_data)
+                json_index.append(idx)
+        if json_rows:
+            frames.append(pd.DataFrame({
+                "timestamp": ts[json_index],
+                "event": "active",
+                "pid": [d.get("pid") for d in json_rows],
+                "name": [d.get("name") for d in json_rows],
+                "exe": [d.get("exe", "") for d in json_rows],
+                "page": [d.get("page_title", "") for d in json_rows],
+                "window_title": [d.get("window_title", "") for d in json_rows],
+                "url": [d.get("url", "") for d in json_rows],
+            }, index=json_index))
+
+    # Old format: "proc_start ..." / "proc_end ..." key=value messages
+    legacy_mask = ~json_mask & msg.str.contains(_PROC_EVENT_RE)
+    if legacy_mask.any():
+        legacy_msg = msg[legacy_mask]
+        event = legacy_msg.str.extract(_PROC_EVENT_RE, expand=False)
+        kv_pairs = legacy_msg.str.extractall(_KV_RE)
+        if not kv_pairs.empty:
+            kv_table = kv_pairs.reset_index().pivot(index="level_0", columns=0, values=1)
+        else:
+            kv_table = pd.DataFrame(index=legacy_msg.index)
+        legacy_df = pd.DataFrame({"timestamp": ts[legacy_mask], "event": event})
+        for col, default in (("pid", None), ("name", None), ("exe", None), ("page", ""), ("window_title", "")):
+            if col in kv_table.columns:
+                legacy_df[col] = kv_table[col].reindex(legacy_df.index).fillna(default) if default is not None else kv_table[col].reindex(legacy_df.index)
+            else:
+                legacy_df[col] = default
+        legacy_df["url"] = ""
+        frames.append(legacy_df[legacy_df["event"].notna()])
+
+    if not frames:
         return pd.DataFrame()
-        
-    return pd.DataFrame(data)
+
+    # Restore original line order via the shared line index
+    df = pd.concat(frames).sort_index().reset_index(drop=True)
+    # These columns are low-cardinality (a handful of event kinds, dozens of
+    # app names), so categorical dtype shrinks them drastically and lets
+    # filters and value_counts compare integer codes instead of strings.
+    # It also makes the on-disk parquet cache far more compact.
+    for col in ('event', 'name', 'exe'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _analyze_from_df(df: pd.DataFrame, source: str, event_kind: str = 'start') -> str:
+    """Build the productivity summary text from an already-parsed DataFrame.
+
+    Shared by the basic-analysis tools and the Gemini prompt builder so the
+    log is downloaded and parsed exactly once per request.
+    """
+    # Work on the underlying ndarrays and reuse the boolean masks: the old
+    # code re-scanned the DataFrame for each min/max/filter, five full passes
+    # over a large log where one per column is enough.
+    ts = df['timestamp'].values
+    start_time = ts.min()
+    end_time = ts.max()
+    duration = end_time - start_time
+    names = df['name'].values
+    event_mask = df['event'].values == event_kind
+    page_vals = df['page'].values if 'page' in df.columns else np.array([], dtype=object)
+    url_vals = df['url'].values if 'url' in df.columns else np.array([], dtype=object)
+    # Format the top apps directly from the value_counts Series: to_markdown
+    # dragged in tabulate and rebuilt the Series from a dict for every report.
+    top_apps = pd.Series(names[event_mask]).value_counts().head(10)
+    apps_block = "\n".join(f"| {name} | {count} |" for name, count in top_apps.items())
+    browser_pages = pd.unique(page_vals[page_vals != ""])
+    urls = pd.unique(url_vals[url_vals != ""])
+    
+    return f"""
+Productivity Analysis for {source}
+-------------------------------------
+Session Start: {start_time}
+Session End:   {end_time}
+Total Duration: {duration}
+
+Top Applications Launched:
+{apps_block if apps_block else "None detected"}
+
+Browser Pages Visited:
+{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
+
+URLs Visited:
+{', '.join(urls) if len(urls) > 0 else "None detected"}
+
+Raw Event Count: {len(df)}
+"""
+
+
+# Prefix listings are repeated constantly by MCP clients polling the same
+# user; a short TTL cache turns those into O(1) dictionary hits. (Blob index
+# tags would let one filtered listing cover several users at once, but the
+# uploader does not tag blobs, so a listing cache is the practical win here.)
+_BLOB_LIST_TTL = 30.0
+_blob_list_cache: dict = {}
+_blob_list_lock = threading.Lock()
+
+
+def _list_blob_tail(prefix: str, limit: int) -> tuple:
+    """Return (total, last `limit` blob names) under a prefix, cached briefly.
+
+    The listing still has to walk every page (Azure offers no reverse
+    ordering), but a deque ring buffer keeps only the tail in memory instead
+    of materializing the whole listing for users with thousands of blobs.
+    """
+    key = (prefix, limit)
+    now = time.time()
+    with _blob_list_lock:
+        cached = _blob_list_cache.get(key)
+        if cached is not None and now - cached[0] < _BLOB_LIST_TTL:
+            return cached[1]
+    container = get_container_client()
+    buf = deque(maxlen=limit)
+    total = 0
+    for b in container.list_blobs(name_starts_with=prefix):
+        buf.append(b.name)
+        total += 1
+    result = (total, list(buf))
+    with _blob_list_lock:
+        _blob_list_cache[key] = (now, result)
+    return result
 
 
 @mcp.tool()
@@ -150,20 +377,14 @@ def list_user_logs(user_id: str, limit: int = 20) -> str:
     Lists the most recent log files for a specific user in Azure Blob Storage.
     """
     try:
-        container = get_container_client()
         # Note: Listing all blobs can be slow if there are thousands.
         # We list them to find the most recent ones (last in alphabetical order).
-        blobs = []
-        for b in container.list_blobs(name_starts_with=f"{user_id}/"):
-            blobs.append(b.name)
-        
-        if not blobs:
+        total, recent_blobs = _list_blob_tail(f"{user_id}/", limit)
+
+        if not recent_blobs:
             return f"No logs found for user: {user_id}"
-        
-        # Get the last 'limit' blobs
-        recent_blobs = blobs[-limit:]
-        
-        return f"Found {len(blobs)} logs for {user_id} (showing last {len(recent_blobs)}):\n" + "\n".join(recent_blobs)
+
+        return f"Found {total} logs for {user_id} (showing last {len(recent_blobs)}):\n" + "\n".join(recent_blobs)
     except Exception as e:
         return f"Error listing logs: {str(e)}"
 
@@ -173,39 +394,12 @@ def analyze_productivity(blob_name: str) -> str:
     Downloads a specific zipped log file, parses the activity, and returns a productivity summary.
     """
     try:
-        log_content = download_and_parse_log(blob_name)
-        df = parse_log_to_df(log_content)
+        df = _load_df(blob_name)
 
         if df.empty:
             return "No process events found in the log."
         
-        # Basic Analysis
-        start_time = df['timestamp'].min()
-        end_time = df['timestamp'].max()
-        duration = end_time - start_time
-        app_counts = df[df['event'] == 'start']['name'].value_counts().to_dict()
-        browser_pages = df[df['page'] != ""]['page'].unique()
-        urls = df[df['url'] != ""]['url'].unique()
-        
-        summary = f"""
-Productivity Analysis for {blob_name}
--------------------------------------
-Session Start: {start_time}
-Session End:   {end_time}
-Total Duration: {duration}
-
-Top Applications Launched:
-{pd.Series(app_counts).to_markdown()}
-
-Browser Pages Visited:
-{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
-
-URLs Visited:
-{', '.join(urls) if len(urls) > 0 else "None detected"}
-
-Raw Event Count: {len(df)}
-"""
-        return summary
+        return _analyze_from_df(df, blob_name)
 
     except Exception as e:
         return f"Error analyzing blob: {str(e)}"
@@ -221,42 +415,49 @@ def analyze_local_productivity(file_path: str) -> str:
         if df.empty:
             return "No process events found in the log."
         
-        # Basic Analysis
-        start_time = df['timestamp'].min()
-        end_time = df['timestamp'].max()
-        duration = end_time - start_time
-        app_counts = df[df['event'] == 'start']['name'].value_counts().to_dict()
-        browser_pages = df[df['page'] != ""]['page'].unique()
-        urls = df[df['url'] != ""]['url'].unique()
-        
-        summary = f"""
-Productivity Analysis for {file_path}
--------------------------------------
-Session Start: {start_time}
-Session End:   {end_time}
-Total Duration: {duration}
+        return _analyze_from_df(df, file_path)
 
-Top Applications Launched:
-{pd.Series(app_counts).to_markdown()}
+    except Exception as e:
+        return f"Error analyzing local file: {str(e)}"
 
-Browser Pages Visited:
-{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
+# Gemini responses cached by prompt hash: identical log content yields an
+# identical prompt, so regenerating a report (deleted file, restart, re-run)
+# shouldn't cost another API round-trip. Plain JSON files under
+# .gemini_cache/ keep this dependency-free.
+_GEMINI_CACHE_DIR = ".gemini_cache"
 
-URLs Visited:
-{', '.join(urls) if len(urls) > 0 else "None detected"}
 
-Raw Event Count: {len(df)}
-"""
-        return summary
+def _gemini_cache_path(prompt: str) -> str:
+    key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_GEMINI_CACHE_DIR, key + ".json")
 
+
+def _gemini_cache_get(prompt: str):
+    path = _gemini_cache_path(prompt)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def _gemini_cache_put(prompt: str, text: str):
+    try:
+        os.makedirs(_GEMINI_CACHE_DIR, exist_ok=True)
+        with open(_gemini_cache_path(prompt), 'w', encoding='utf-8') as f:
+            f.write(text)
     except Exception as e:
-        return f"Error analyzing local file: {str(e)}"
+        print(f"Warning: could not write Gemini cache: {e}", file=sys.stderr)
+
 
 @mcp.tool()
-def generate_ai_productivity_report(blob_name: str, is_local: bool = False, user_id: str = None) -> str:
+def generate_ai_productivity_report(blob_name: str, is_local: bool = False, user_id: str = None, force_refresh: bool = False) -> str:
     """
     Uses Gemini AI to generate a productivity report and predictions based on the log data.
     Also saves raw data and analysis to the database.
+    Pass force_refresh=True to bypass the cached Gemini response for this log.
     """
     if not GEMINI_API_KEY:
         return "Error: GEMINI_API_KEY is not set in the environment."
@@ -268,47 +469,23 @@ def generate_ai_productivity_report(blob_name: str, is_local: bool = False, user
             # Try to infer user_id from filename if not provided
             if not user_id:
                 user_id = "local_user"
+            df = parse_log_to_df(log_content)
         else:
-            log_content = download_and_parse_log(blob_name)
             # Try to infer user_id from blob path "userid/..."
             if not user_id and "/" in blob_name:
                 user_id = blob_name.split("/")[0]
-        
+            df = _load_df(blob_name)
+
         if not user_id:
             user_id = "unknown"
 
-        df = parse_log_to_df(log_content)
-
         if df.empty:
             return "No data found."
 
-        # 3. Generate Analysis Summary for Gemini
-        # Basic Analysis
+        # 3. Generate Analysis Summary for Gemini (same parse, no re-download)
         start_time = df['timestamp'].min()
         end_time = df['timestamp'].max()
-        duration = end_time - start_time
-        app_counts = df[df['event'] == 'active']['name'].value_counts().to_dict()
-        browser_pages = df[df['page'] != ""]['page'].unique()
-        urls = df[df['url'] != ""]['url'].unique()
-        
-        basic_analysis = f"""
-Productivity Analysis for {blob_name}
--------------------------------------
-Session Start: {start_time}
-Session End:   {end_time}
-Total Duration: {duration}
-
-Top Applications Launched:
-{pd.Series(app_counts).to_markdown()}
-
-Browser Pages Visited:
-{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
-
-URLs Visited:
-{', '.join(urls) if len(urls) > 0 else "None detected"}
-
-Raw Event Count: {len(df)}
-"""
+        basic_analysis = _analyze_from_df(df, blob_name, event_kind='active')
         
         if "Error" in basic_analysis:
             return basic_analysis
@@ -344,17 +521,14 @@ Raw Event Count: {len(df)}
         - Strictly return ONLY the JSON object. Do not include markdown formatting like ```json or any other text.
         """
         
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        
-        # Clean up response if it contains markdown code blocks
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
+        text = None if force_refresh else _gemini_cache_get(prompt)
+        if text is None:
+            # Structured output: the model is configured with a JSON response
+            # schema, so the text is already valid JSON with no markdown
+            # fences to strip.
+            response = _gemini_model.generate_content(prompt)
+            text = response.text.strip()
+            _gemini_cache_put(prompt, text)
             
         # Inject user_id and timestamps
         try:
@@ -372,6 +546,56 @@ Raw Event Count: {len(df)}
         return f"Error generating AI report: {str(e)}"
 
 
+# Append-only manifest of generated reports: one summary row per report so
+# aggregate queries read a single file instead of re-opening every report
+# JSON under reports/.
+_MANIFEST_NAME = "manifest.jsonl"
+_manifest_lock = threading.Lock()
+
+
+def _append_manifest_row(reports_dir: str, blob_name: str, report_content: str):
+    """Record a summary row for a freshly generated report in the manifest."""
+    try:
+        data = orjson.loads(report_content)
+    except orjson.JSONDecodeError:
+        # Error strings and non-JSON responses don't belong in the manifest.
+        return
+    row = {
+        "blob_name": blob_name,
+        "user_id": data.get("user_id"),
+        "is_productive": data.get("is_productive"),
+        "is_dangerous": data.get("is_dangerous"),
+        "app_count": len(data.get("apps") or []),
+        "start_time": data.get("start_time"),
+        "end_time": data.get("end_time"),
+        "generated_at": datetime.now().isoformat(),
+    }
+    with _manifest_lock:
+        with open(os.path.join(reports_dir, _MANIFEST_NAME), "a", encoding="utf-8") as f:
+            f.write(orjson.dumps(row).decode("utf-8") + "\n")
+
+
+def query_reports(start=None, end=None, reports_dir: str = "reports") -> pd.DataFrame:
+    """Return manifest rows whose session start falls in [start, end].
+
+    One line-delimited read over the manifest replaces walking reports/ and
+    parsing every report file.
+    """
+    path = os.path.join(reports_dir, _MANIFEST_NAME)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    df = pd.read_json(path, lines=True)
+    if df.empty:
+        return df
+    ts = pd.to_datetime(df["start_time"], errors="coerce")
+    mask = ts.notna()
+    if start is not None:
+        mask &= ts >= pd.to_datetime(start)
+    if end is not None:
+        mask &= ts <= pd.to_datetime(end)
+    return df[mask].reset_index(drop=True)
+
+
 def _ensure_bool_int(value):
     """Normalize boolean-like values to 0/1 for SQLite."""
     if isinstance(value, bool):
@@ -549,26 +773,44 @@ if __name__ == "__main__":
                 print("No logs found.")
             else:
                 print(f"Found {len(blobs)} logs. Processing...")
-                for i, blob in enumerate(blobs):
-                    safe_name = blob.name.replace('/', '_').replace('\\', '_').replace('.zip', '.json')
+                pending = []
+                skipped = 0
+                for blob in blobs:
+                    safe_name = _safe_report_name(blob.name)
                     report_path = os.path.join(reports_dir, safe_name)
-                    
                     if os.path.exists(report_path) and not force:
-                        print(f"[{i+1}/{len(blobs)}] Skipping existing: {safe_name} (Use --force to overwrite)")
+                        skipped += 1
                         continue
-                        
-                    print(f"[{i+1}/{len(blobs)}] Generating report for: {blob.name}")
-                    try:
-                        # Pass user_id explicitly to ensure DB updates work correctly
-                        report_content = generate_ai_productivity_report(blob.name, user_id=user_id)
-                        if "Error" in report_content and not report_content.strip().startswith("{"):
-                             print(f"  Failed: {report_content}")
-                        else:
-                            with open(report_path, 'w', encoding='utf-8') as f:
-                                f.write(report_content)
-                            print(f"  Saved to {report_path}")
-                    except Exception as e:
-                        print(f"  Error processing {blob.name}: {e}")
+                    pending.append((blob.name, report_path))
+                if skipped:
+                    print(f"Skipping {skipped} existing report(s). (Use --force to overwrite)")
+                
+                def _generate_one(item):
+                    blob_name, report_path = item
+                    # Pass user_id explicitly to ensure DB updates work correctly
+                    report_content = generate_ai_productivity_report(blob_name, user_id=user_id)
+                    if "Error" in report_content and not report_content.strip().startswith("{"):
+                        raise RuntimeError(report_content)
+                    with open(report_path, 'w', encoding='utf-8') as f:
+                        f.write(report_content)
+                    return report_path
+                
+                # Each report is dominated by the blob download and the
+                # Gemini round-trip, so overlap them across workers and
+                # write reports as they complete. The worker count bounds
+                # in-flight Gemini calls; tune it to the API quota via
+                # AAM_REPORT_WORKERS.
+                done = 0
+                workers = int(os.getenv("AAM_REPORT_WORKERS", "10"))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {executor.submit(_generate_one, item): item[0] for item in pending}
+                    for future in as_completed(futures):
+                        blob_name = futures[future]
+                        done += 1
+                        try:
+                            print(f"[{done}/{len(pending)}] Saved {future.result()} ({blob_name})")
+                        except Exception as e:
+                            print(f"[{done}/{len(pending)}] Error processing {blob_name}: {e}")
                         
         except Exception as e:
             print(f"Error: {e}")
@@ -615,43 +857,99 @@ if __name__ == "__main__":
         print(f"Reports will be saved to '{reports_dir}/'")
         print("Press Ctrl+C to stop.")
         
+        # Incremental listing state: a last_modified watermark plus the map of
+        # already-processed blobs, persisted so restarts don't re-examine (or
+        # re-generate) everything. Replaces the per-blob os.path.exists checks.
+        state_path = os.path.join(reports_dir, "state.json")
+        state = {"last_seen": None, "processed": {}}
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"Warning: could not read {state_path}: {e}")
+        last_seen = datetime.fromisoformat(state["last_seen"]) if state.get("last_seen") else None
+        processed = dict(state.get("processed") or {})
+        # Reports already on disk count as processed: they predate state.json
+        # (or survive its loss), and without this a first run would submit
+        # the user's entire blob history to Gemini.
+        existing_reports = set(os.listdir(reports_dir))
+
         while True:
             try:
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Checking for new logs...")
                 container = get_container_client()
-                # List all blobs for the user
-                # Optimization: This can be slow if there are many blobs.
-                # We iterate and keep the last 100 to check against.
-                blobs = []
+                # Delta listing: anything at or before the watermark, or
+                # already in the processed map, is skipped without touching
+                # the filesystem. Only genuinely new blobs survive.
+                seeded = False
+                new_blobs = []
+                max_listed = last_seen
                 for b in container.list_blobs(name_starts_with=f"{user_id}/"):
-                    blobs.append(b)
-                
-                # Only look at the last 20 blobs to save time on checking existence
-                recent_blobs = blobs[-20:] if blobs else []
-                
-                if not recent_blobs:
-                    print(f"  No logs found yet. Waiting...")
+                    if max_listed is None or b.last_modified > max_listed:
+                        max_listed = b.last_modified
+                    if last_seen is not None and b.last_modified <= last_seen:
+                        continue
+                    if b.name in processed:
+                        continue
+                    if _safe_report_name(b.name) in existing_reports:
+                        processed[b.name] = b.last_modified.isoformat()
+                        seeded = True
+                        continue
+                    new_blobs.append(b)
+
+                # Hard per-cycle cap, applied unconditionally: whatever state
+                # the history is in (fresh run, lost state file, blobs that
+                # were never reported), one poll generates at most the 20
+                # most recent reports, keeping Gemini spend per cycle bounded.
+                new_blobs = new_blobs[-20:]
+
+                if not new_blobs:
+                    print(f"  No new logs. Waiting...")
+                    if seeded:
+                        state["processed"] = processed
+                        with open(state_path, 'w', encoding='utf-8') as f:
+                            json.dump(state, f)
                 else:
-                    for blob in recent_blobs:
+                    pending = []
+                    for blob in new_blobs:
                         # Create a safe filename for the report
-                        safe_name = blob.name.replace('/', '_').replace('\\', '_').replace('.zip', '.json')
-                        report_path = os.path.join(reports_dir, safe_name)
-                        
-                        # Check if report already exists
-                        if not os.path.exists(report_path):
-                            print(f"  New log found: {blob.name}")
-                            print("  Generating AI Report...")
-                            
-                            report_content = generate_ai_productivity_report(blob.name)
-                            
-                            # Save report
-                            with open(report_path, 'w', encoding='utf-8') as f:
-                                f.write(report_content)
-                                
-                            print(f"  Saved report to: {report_path}")
-                        else:
-                            # Report already exists, skip
-                            pass
+                        safe_name = _safe_report_name(blob.name)
+                        pending.append((blob.name, os.path.join(reports_dir, safe_name), blob.last_modified))
+                    
+                    print(f"  {len(pending)} new log(s) found. Generating reports...")
+                    
+                    def _generate_and_save(item):
+                        blob_name, report_path, _ = item
+                        report_content = generate_ai_productivity_report(blob_name)
+                        with open(report_path, 'w', encoding='utf-8') as f:
+                            f.write(report_content)
+                        _append_manifest_row(reports_dir, blob_name, report_content)
+                        return report_path
+                    
+                    # Each report is download + parse + Gemini round-trip,
+                    # all latency-bound; overlap a few so a backlog clears
+                    # in roughly one round-trip instead of N.
+                    failures = False
+                    with ThreadPoolExecutor(max_workers=4) as executor:
+                        futures = {executor.submit(_generate_and_save, item): item for item in pending}
+                        for future in as_completed(futures):
+                            blob_name, _, last_modified = futures[future]
+                            try:
+                                print(f"  Saved report to: {future.result()}")
+                                processed[blob_name] = last_modified.isoformat()
+                            except Exception as e:
+                                failures = True
+                                print(f"  Error processing {blob_name}: {e}")
+                    
+                    # Advance the watermark only on a clean cycle so a failed
+                    # blob is picked up again on the next poll.
+                    if not failures and max_listed is not None:
+                        last_seen = max_listed
+                    state["last_seen"] = last_seen.isoformat() if last_seen else None
+                    state["processed"] = processed
+                    with open(state_path, 'w', encoding='utf-8') as f:
+                        json.dump(state, f)
                             
                 # Wait before next poll
                 time.sleep(60)
@@ -1,9 +1,12 @@
 import os
+import re
 import sys
+import queue
+import threading
 import zipfile
-import shutil
 import sqlite3
 import jwt
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import Flask, request, render_template, jsonify
@@ -26,17 +29,90 @@ CONNECT_STR = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
 CONTAINER_NAME = os.getenv('AZURE_CONTAINER_NAME', 'appmonitor')
 SECRET_KEY = os.getenv('SECRET_KEY', 'your_secret_key_here') # Change this in production!
 DOWNLOAD_FOLDER = "server_downloads"
-EXTRACT_FOLDER = "server_extracted_logs"
 DB_NAME = "monitor.db"
 
 # Ensure directories exist
 os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
-os.makedirs(EXTRACT_FOLDER, exist_ok=True)
+
+# One container client for the whole process: building it per request
+# re-parsed the connection string and re-established the TLS session pool
+# before a single byte of the blob moved.
+_blob_container = None
+if CONNECT_STR:
+    _blob_container = BlobServiceClient.from_connection_string(
+        CONNECT_STR,
+        max_single_get_size=64 * 1024 * 1024,
+        max_chunk_get_size=4 * 1024 * 1024,
+    ).get_container_client(CONTAINER_NAME)
+else:
+    print("Warning: AZURE_STORAGE_CONNECTION_STRING is not set in .env file.")
+
+class ConnectionPool:
+    """Small SQLite pool: N reader connections plus a single writer.
+
+    Every endpoint used to run sqlite3.connect per request, paying the file
+    open and journal setup each time and serializing unrelated reads. Pooled
+    connections are opened once and reused; reads draw from the reader queue
+    while writes share one connection behind a lock (SQLite allows only one
+    writer anyway).
+    """
+
+    def __init__(self, db_name, readers=None):
+        if readers is None:
+            readers = int(os.getenv('DB_POOL_READERS', '5'))
+        self.db_name = db_name
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(self._connect(readonly=True))
+        self._writer = self._connect()
+        self._writer_lock = threading.Lock()
+
+    def _connect(self, readonly=False):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        # journal_mode=WAL is sticky on the file (set in init_db); these are
+        # per-connection and must be re-applied on every pooled connection.
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -20000;")
+        conn.execute("PRAGMA mmap_size = 268435456;")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    @contextmanager
+    def get_conn(self, readonly=False):
+        if readonly:
+            conn = self._readers.get()
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+        else:
+            # Mirror sqlite3's connection context semantics: commit on
+            # success, roll back if the request handler raised.
+            with self._writer_lock:
+                try:
+                    yield self._writer
+                    self._writer.commit()
+                except Exception:
+                    self._writer.rollback()
+                    raise
+
+pool = ConnectionPool(DB_NAME)
 
 def init_db():
     with sqlite3.connect(DB_NAME) as conn:
         c = conn.cursor()
         c.execute("PRAGMA foreign_keys = ON;")
+        # WAL lets readers proceed while a writer commits and is sticky on
+        # the database file; synchronous=NORMAL drops the worst-case fsync
+        # per commit that login/logs requests were latency-bound on.
+        c.execute("PRAGMA journal_mode = WAL;")
+        c.execute("PRAGMA synchronous = NORMAL;")
+        c.execute("PRAGMA temp_store = MEMORY;")
+        c.execute("PRAGMA cache_size = -20000;")
+        c.execute("PRAGMA mmap_size = 268435456;")
         
         # Create users table
         c.execute('''
@@ -76,6 +152,13 @@ def init_db():
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
+
+        # B-tree point lookups for the hot queries: /logs filters on
+        # logs.user_id and /get_user_id searches users by name; both were
+        # full scans as the tables grew (email is already covered by its
+        # UNIQUE constraint).
+        c.execute("CREATE INDEX IF NOT EXISTS idx_logs_user_id ON logs(user_id);")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users(name);")
         conn.commit()
 
 def token_required(f):
@@ -126,20 +209,22 @@ def get_file_from_azure(filename):
     Downloads a file from Azure Blob Storage to the local DOWNLOAD_FOLDER.
     """
     try:
-        if not CONNECT_STR:
+        if _blob_container is None:
             print("Error: AZURE_STORAGE_CONNECTION_STRING is not set in .env file.")
             return None
 
-        blob_service_client = BlobServiceClient.from_connection_string(CONNECT_STR)
-        blob_client = blob_service_client.get_blob_client(container=CONTAINER_NAME, blob=filename)
+        blob_client = _blob_container.get_blob_client(filename)
         
         # Security: Sanitize the filename to prevent path traversal attacks
         safe_filename = secure_filename(filename)
         local_zip_path = os.path.join(DOWNLOAD_FOLDER, safe_filename)
         
         print(f"Downloading {filename} to {local_zip_path}...")
+        # Stream straight into the file: readall() materialized the whole
+        # zip as one bytes object first. readinto also fetches large blobs
+        # as parallel ranged GETs.
         with open(local_zip_path, "wb") as download_file:
-            download_file.write(blob_client.download_blob().readall())
+            blob_client.download_blob(max_concurrency=4).readinto(download_file)
             
         print(f"Downloaded {filename} successfully.")
         return local_zip_path
@@ -147,72 +232,84 @@ def get_file_from_azure(filename):
         print(f"Azure Download Error: {e}")
         return None
 
-def unzip_file(zip_path):
-    """
-    Unzips the given zip file into the EXTRACT_FOLDER.
-    Clears the folder first to avoid mixing logs.
+# Path of the most recently downloaded zip; /report and /admin/reports
+# parse it directly instead of a pre-extracted folder.
+_current_zip_path = None
+
+def _latest_zip_path():
+    """Return the zip to report on.
+
+    Normally the one remembered from the last /files call; after a restart
+    that is gone, so fall back to the most recently downloaded zip still in
+    DOWNLOAD_FOLDER (the extracted-folder version kept serving across
+    restarts, and /report should too).
     """
-    try:
-        # Clear existing files
-        if os.path.exists(EXTRACT_FOLDER):
-            shutil.rmtree(EXTRACT_FOLDER)
-        os.makedirs(EXTRACT_FOLDER, exist_ok=True)
-
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(EXTRACT_FOLDER)
-        print(f"Extracted {zip_path} to {EXTRACT_FOLDER}")
-        return True
-    except Exception as e:
-        print(f"Unzip Error: {e}")
-        return False
+    global _current_zip_path
+    if _current_zip_path and os.path.exists(_current_zip_path):
+        return _current_zip_path
+    candidates = [
+        os.path.join(DOWNLOAD_FOLDER, name)
+        for name in os.listdir(DOWNLOAD_FOLDER)
+        if name.endswith('.zip')
+    ]
+    if candidates:
+        _current_zip_path = max(candidates, key=os.path.getmtime)
+    return _current_zip_path
+
+# Case-insensitive error scan on the raw bytes, compiled once: upper-casing
+# every decoded line allocated two throwaway strings per line.
+_ERR_RE = re.compile(rb'(?i)error')
+
+def _collect_zip_lines(zf, contents, statuses):
+    """Append parsed lines from every text/log member of an open ZipFile,
+    recursing into nested zips via their streams."""
+    # Bound methods hoisted out of the per-line loop
+    add_content = contents.append
+    add_status = statuses.append
+    for name in zf.namelist():
+        # Case 1: Text or Log files
+        if name.endswith('.txt') or name.endswith('.log'):
+            try:
+                with zf.open(name) as member:
+                    # zipfile.open returns bytes; classify on the raw bytes
+                    # and decode only the lines that are kept
+                    for line_bytes in member:
+                        line_bytes = line_bytes.strip()
+                        if not line_bytes: continue
+                        
+                        # Simple logic to highlight errors
+                        add_status("Danger" if _ERR_RE.search(line_bytes) else "Normal")
+                        add_content(line_bytes.decode('utf-8', errors='ignore'))
+            except Exception as e:
+                print(f"Error reading file {name}: {e}")
+
+        # Case 2: Nested zip files
+        elif name.endswith('.zip'):
+            try:
+                with zipfile.ZipFile(zf.open(name)) as nested:
+                    _collect_zip_lines(nested, contents, statuses)
+            except Exception as e:
+                print(f"Error reading zip file {name}: {e}")
 
-def parse_logs_from_disk():
+def parse_logs_from_zip(zip_path):
     """
-    Reads all text/log files from the EXTRACT_FOLDER and parses them.
-    Also looks into .zip files found in the folder.
-    Returns a list of dictionaries: [{'content': '...', 'status': '...'}, ...]
+    Streams log lines directly out of the downloaded zip, decompressing
+    entry by entry. Nothing is extracted to disk, so the bytes are read
+    once instead of written out and walked again.
+    Returns two parallel columns: {'contents': [...], 'statuses': [...]}.
+    One dict per line cost two dict entries and an object header per row;
+    the columnar shape halves the object count and serializes faster.
     """
-    processed_lines = []
+    contents = []
+    statuses = []
+    if not zip_path or not os.path.exists(zip_path):
+        return {"contents": contents, "statuses": statuses}
     try:
-        # Iterate over all files in the extract folder  
-        for root, dirs, files in os.walk(EXTRACT_FOLDER):
-            for file_name in files:
-                full_path = os.path.join(root, file_name)
-                
-                # Case 1: Text or Log files
-                if file_name.endswith('.txt') or file_name.endswith('.log'):
-                    try:
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-                            for line in log_file:
-                                line = line.strip()
-                                if not line: continue
-                                
-                                # Simple logic to highlight errors
-                                status = "Danger" if "ERROR" in line.upper() else "Normal"
-                                processed_lines.append({"content": line, "status": status})
-                    except Exception as e:
-                        print(f"Error reading file {file_name}: {e}")
-
-                # Case 2: Zip files (Nested or just present)
-                elif file_name.endswith('.zip'):
-                    try:
-                        with zipfile.ZipFile(full_path, 'r') as zf:
-                            for internal_filename in zf.namelist():
-                                if internal_filename.endswith('.txt') or internal_filename.endswith('.log'):
-                                    with zf.open(internal_filename) as internal_file:
-                                        # zipfile.open returns bytes, need to decode
-                                        for line_bytes in internal_file:
-                                            line = line_bytes.decode('utf-8', errors='ignore').strip()
-                                            if not line: continue
-                                            status = "Danger" if "ERROR" in line.upper() else "Normal"
-                                            processed_lines.append({"content": line, "status": status})
-                    except Exception as e:
-                        print(f"Error reading zip file {file_name}: {e}")
-                        
-        return processed_lines
+        with zipfile.ZipFile(zip_path) as zf:
+            _collect_zip_lines(zf, contents, statuses)
     except Exception as e:
-        print(f"Error walking log directory: {e}")
-        return []
+        print(f"Error reading zip file {zip_path}: {e}")
+    return {"contents": contents, "statuses": statuses}
 
 @app.route('/files', methods=['POST'])
 def download_and_unzip():
@@ -226,6 +323,7 @@ def download_and_unzip():
     if not filename:
         return jsonify({"error": "No filename provided"}), 400
     
+    global _current_zip_path
     # Note: We do NOT sanitize 'filename' here because we need to preserve 
     # folder paths (e.g. "1/monitor.log.zip") for Azure.
     # The get_file_from_azure function handles local path security internally.
@@ -233,12 +331,12 @@ def download_and_unzip():
     zip_path = get_file_from_azure(filename)
     if not zip_path:
         return jsonify({"error": "Failed to download from Azure. Check server logs."}), 500
-    # 2. Unzip to disk
-    success = unzip_file(zip_path)
-    if success:
-        return jsonify({"message": "File downloaded and extracted successfully."}), 200
-    else:
-        return jsonify({"error": "Failed to extract zip file"}), 500
+    # 2. Validate and remember it; /report parses the zip in place, so there
+    # is no extraction step.
+    if not zipfile.is_zipfile(zip_path):
+        return jsonify({"error": "Downloaded file is not a valid zip"}), 500
+    _current_zip_path = zip_path
+    return jsonify({"message": "File downloaded successfully."}), 200
 
 @app.route('/report', methods=['GET'])
 def generate_report():
@@ -246,12 +344,12 @@ def generate_report():
     Endpoint to view the report.
     Reads parsed data from the extracted files on disk.
     """
-    logs = parse_logs_from_disk()
+    logs = parse_logs_from_zip(_latest_zip_path())
     return render_template('report.html', logs=logs)
 
 @app.route('/users', methods=['GET'])
 def get_users():
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn(readonly=True) as conn:
         c = conn.cursor()
         c.execute("SELECT * FROM users")
         users = [{"id": row[0], "name": row[1], "email": row[2]} for row in c.fetchall()]
@@ -259,7 +357,7 @@ def get_users():
 
 @app.route('/users', methods=['POST'])
 def create_user():
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn() as conn:
         c = conn.cursor()
         data = request.get_json()
         
@@ -285,7 +383,7 @@ def login():
     if not data or not data.get('email') or not data.get('password'):
         return jsonify({"error": "Missing email or password"}), 400
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn(readonly=True) as conn:
         c = conn.cursor()
         c.execute("SELECT id, name, password, role FROM users WHERE email = ?", (data['email'],))
         user = c.fetchone()
@@ -304,16 +402,19 @@ def login():
 @app.route('/logs', methods=['GET'])
 @token_required
 def get_logs(current_user_id):
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn(readonly=True) as conn:
         c = conn.cursor()
-        c.execute("SELECT * FROM logs WHERE user_id = ?", (current_user_id,))
-        logs = [{"id": row[0], "user_id": row[1], "log_file_url": row[2], "timestamp": row[3]} for row in c.fetchall()]
+        # Project just the needed columns; user_id is already known from the
+        # token, and the narrower row lets SQLite satisfy more of the query
+        # from the index.
+        c.execute("SELECT id, log_file_url, timestamp FROM logs WHERE user_id = ?", (current_user_id,))
+        logs = [{"id": row[0], "user_id": current_user_id, "log_file_url": row[1], "timestamp": row[2]} for row in c.fetchall()]
         return jsonify(logs)
 
 @app.route('/logs', methods=['POST'])
 @token_required
 def create_log(current_user_id):
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn() as conn:
         c = conn.cursor()
         data = request.get_json()
         try:
@@ -336,7 +437,7 @@ def get_user_id():
     if not username:
         return jsonify({"error": "Username is required"}), 400
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with pool.get_conn(readonly=True) as conn:
         c = conn.cursor()
         # Try to find by name
         c.execute("SELECT id FROM users WHERE name = ?", (username,))
@@ -359,7 +460,7 @@ def get_admin_reports():
     """
     API Endpoint for Admin Dashboard to get parsed logs.
     """
-    logs = parse_logs_from_disk()
+    logs = parse_logs_from_zip(_latest_zip_path())
     return jsonify(logs)
 
 @app.route('/', methods=['GET'])
@@ -2,7 +2,10 @@ import os
 import sys
 import time
 import json
+import orjson
+import hashlib
 import threading
+import functools
 import logging
 import google.generativeai as genai
 import pandas as pd
@@ -11,18 +14,66 @@ from dotenv import load_dotenv
 
 # Try relative import first, then absolute
 try:
-    from .shared_utils import get_container_client, download_and_parse_log, parse_log_to_df
+    from .shared_utils import get_container_client, download_and_parse_log, parse_log_to_df, load_log_df, summarize_df
 except ImportError:
     try:
-        from shared_utils import get_container_client, download_and_parse_log, parse_log_to_df
+        from shared_utils import get_container_client, download_and_parse_log, parse_log_to_df, load_log_df, summarize_df
     except ImportError:
         # Fallback for when running from root without package structure
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from shared_utils import get_container_client, download_and_parse_log, parse_log_to_df
+        from shared_utils import get_container_client, download_and_parse_log, parse_log_to_df, load_log_df, summarize_df
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# Path-separator sanitization for report filenames, one translate table
+# instead of chained str.replace allocations per blob.
+_SAFE_TRANS = str.maketrans({'/': '_', '\\': '_'})
+
+
+def _safe_report_name(blob_name: str) -> str:
+    """Map a blob name to its report filename."""
+    safe = blob_name.translate(_SAFE_TRANS)
+    return safe[:-4] + '.json' if safe.endswith('.zip') else safe + '.json'
+
+
+
+# On-disk cache of Gemini responses keyed by a hash of the prompt. Since
+# the prompt embeds the session summary, an unchanged log (re-run after a
+# deleted report, or an identical session) resolves without an API call.
+_GEMINI_CACHE_DIR = ".gemini_cache"
+
+
+def _gemini_cache_path(prompt: str) -> str:
+    key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_GEMINI_CACHE_DIR, key + ".json")
+
+
+def _gemini_cache_get(prompt: str):
+    path = _gemini_cache_path(prompt)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def _gemini_cache_put(prompt: str, text: str):
+    try:
+        os.makedirs(_GEMINI_CACHE_DIR, exist_ok=True)
+        with open(_gemini_cache_path(prompt), 'w', encoding='utf-8') as f:
+            f.write(text)
+    except Exception as e:
+        print(f"Warning: could not write Gemini cache: {e}", file=sys.stderr)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """One shared GenerativeModel handle; it is thread-safe and reusable."""
+    return genai.GenerativeModel('gemini-2.5-flash')
+
 class GeminiService:
     def __init__(self, reports_dir="reports", user_id_to_monitor=None):
         self.reports_dir = reports_dir
@@ -49,51 +100,103 @@ class GeminiService:
         if self.thread:
             self.thread.join(timeout=5)
 
+    def _load_processed(self):
+        """Load the set of already-reported blob names from disk."""
+        path = os.path.join(self.reports_dir, "processed.json")
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return set(json.load(f))
+            except Exception as e:
+                print(f"GeminiService: could not read {path}: {e}")
+        return set()
+
+    @staticmethod
+    def _name_watermarks(processed):
+        """Highest processed blob name per user prefix.
+
+        Blob names are "{user_id}/{timestamp}...", so lexicographic ordering
+        only holds within one user's prefix; a single global watermark would
+        permanently skip every user sorting below the highest processed name.
+        """
+        marks = {}
+        for name in processed:
+            user = name.split('/', 1)[0]
+            if name > marks.get(user, ""):
+                marks[user] = name
+        return marks
+
+    def _save_processed(self, processed):
+        path = os.path.join(self.reports_dir, "processed.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(processed), f)
+
     def monitor_loop(self):
         if not os.path.exists(self.reports_dir):
             os.makedirs(self.reports_dir)
             
         print(f"GeminiService: Monitoring Azure logs...")
         
+        # Blob names already reported, kept in memory and mirrored to disk so
+        # each poll is a set lookup instead of an os.path.exists per blob
+        # (and restarts don't regenerate old reports).
+        processed = self._load_processed()
+        # Report files already on disk also count as processed: they predate
+        # processed.json (or survive its loss), and without this a fresh state
+        # file would re-generate — and re-bill Gemini for — reports we have.
+        existing_reports = set(os.listdir(self.reports_dir))
+        # Delta-polling watermarks, one per user prefix: within a prefix the
+        # timestamped names sort chronologically, so anything at or below the
+        # user's watermark is dismissed with a string compare and per-poll
+        # work is O(new blobs) instead of re-considering the whole history.
+        watermarks = self._name_watermarks(processed)
+
         while self.running:
             try:
                 container = get_container_client()
-                
-                # List blobs
-                blobs = []
+
                 prefix = f"{self.user_id}/" if self.user_id else None
-                
-                # Note: listing all blobs can be slow. 
+
+                # Note: listing all blobs can be slow.
                 # In a real production app, we'd use Event Grid or similar.
-                # For this utility, we'll list and check the recent ones.
-                blob_iter = container.list_blobs(name_starts_with=prefix)
-                
-                # We can't easily slice an iterator without consuming it.
-                # Let's consume it but limit the count if it's huge? 
-                # Or just convert to list (might be memory heavy if millions).
-                # Assuming reasonable number of logs for this project.
-                blobs = list(blob_iter)
-                
-                # Check last 20 blobs (most recent usually at the end if named by timestamp/lexicographically)
-                recent_blobs = blobs[-20:] if blobs else []
-                
-                for blob in recent_blobs:
+                dirty = False
+                new_blobs = []
+                for blob in container.list_blobs(name_starts_with=prefix):
+                    if blob.name <= watermarks.get(blob.name.split('/', 1)[0], ""):
+                        continue
+                    if blob.name in processed:
+                        continue
+                    if _safe_report_name(blob.name) in existing_reports:
+                        processed.add(blob.name)
+                        dirty = True
+                        continue
+                    new_blobs.append(blob)
+
+                # Hard per-cycle cap, applied unconditionally: however the
+                # history looks (fresh install, lost state, blobs that were
+                # never reported), one poll reports on at most the 20 most
+                # recent new logs — Gemini spend per cycle stays bounded.
+                new_blobs = new_blobs[-20:]
+                for blob in new_blobs:
                     if not self.running: break
                     
-                    # Create a safe filename for the report
-                    safe_name = blob.name.replace('/', '_').replace('\\', '_').replace('.zip', '.json')
-                    report_path = os.path.join(self.reports_dir, safe_name)
+                    report_path = os.path.join(self.reports_dir, _safe_report_name(blob.name))
                     
-                    if not os.path.exists(report_path):
-                        print(f"GeminiService: New log found: {blob.name}")
-                        print("GeminiService: Generating AI Report...")
-                        
-                        report_content = self.generate_ai_productivity_report(blob.name)
+                    print(f"GeminiService: New log found: {blob.name}")
+                    print("GeminiService: Generating AI Report...")
+                    
+                    report_content = self.generate_ai_productivity_report(blob.name)
+                    
+                    with open(report_path, 'w', encoding='utf-8') as f:
+                        f.write(report_content)
                         
-                        with open(report_path, 'w', encoding='utf-8') as f:
-                            f.write(report_content)
-                            
-                        print(f"GeminiService: Saved report to: {report_path}")
+                    processed.add(blob.name)
+                    dirty = True
+                    print(f"GeminiService: Saved report to: {report_path}")
+                
+                if dirty:
+                    self._save_processed(processed)
+                    watermarks = self._name_watermarks(processed)
                 
                 # Sleep
                 for _ in range(60):
@@ -104,25 +207,21 @@ class GeminiService:
                 print(f"Error in GeminiService monitor loop: {e}")
                 time.sleep(60)
 
-    def generate_ai_productivity_report(self, blob_name: str, is_local: bool = False, user_id: str = None) -> str:
+    def generate_ai_productivity_report(self, blob_name: str, is_local: bool = False, user_id: str = None, df: pd.DataFrame = None) -> str:
         """
         Uses Gemini AI to generate a productivity report and predictions based on the log data.
+        Callers that already parsed the log can pass the DataFrame via `df`
+        to skip the download + parse.
         """
         if not GEMINI_API_KEY:
             return "Error: GEMINI_API_KEY is not set in the environment."
 
         try:
-            # 1. Get Log Content & Parse
+            # 1. Get Log Content & Parse (once; shared with the basic analyzer)
             if is_local:
-                # Assuming read_local_log is available or we implement it here.
-                # But this method is mostly for Azure blobs in the service context.
-                # We'll skip local support in the service for now or import it.
-                from .shared_utils import read_local_log
-                log_content = read_local_log(blob_name)
                 if not user_id:
                     user_id = "local_user"
             else:
-                log_content = download_and_parse_log(blob_name)
                 # Try to infer user_id from blob path "userid/..."
                 if not user_id and "/" in blob_name:
                     user_id = blob_name.split("/")[0]
@@ -130,7 +229,8 @@ class GeminiService:
             if not user_id:
                 user_id = "unknown"
 
-            df = parse_log_to_df(log_content)
+            if df is None:
+                df = load_log_df(blob_name, is_local=is_local)
 
             if df.empty:
                 return "No data found."
@@ -138,29 +238,7 @@ class GeminiService:
             # 3. Generate Analysis Summary for Gemini
             start_time = df['timestamp'].min()
             end_time = df['timestamp'].max()
-            duration = end_time - start_time
-            app_counts = df[df['event'] == 'active']['name'].value_counts().to_dict()
-            browser_pages = df[df['page'] != ""]['page'].unique()
-            urls = df[df['url'] != ""]['url'].unique()
-            
-            basic_analysis = f"""
-Productivity Analysis for {blob_name}
--------------------------------------
-Session Start: {start_time}
-Session End:   {end_time}
-Total Duration: {duration}
-
-Top Applications Launched:
-{pd.Series(app_counts).to_markdown()}
-
-Browser Pages Visited:
-{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
-
-URLs Visited:
-{', '.join(urls) if len(urls) > 0 else "None detected"}
-
-Raw Event Count: {len(df)}
-"""
+            basic_analysis = summarize_df(df, blob_name, event_kind='active')
             
             if "Error" in basic_analysis:
                 return basic_analysis
@@ -196,26 +274,28 @@ Raw Event Count: {len(df)}
             - Strictly return ONLY the JSON object. Do not include markdown formatting like ```json or any other text.
             """
             
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            
-            # Clean up response
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
+            text = _gemini_cache_get(prompt)
+            if text is None:
+                response = _get_model().generate_content(prompt)
+                
+                # Clean up response
+                text = response.text.strip()
+                if text.startswith("```json"):
+                    text = text[7:]
+                if text.startswith("```"):
+                    text = text[3:]
+                if text.endswith("```"):
+                    text = text[:-3]
+                _gemini_cache_put(prompt, text.strip())
                 
             # Inject user_id and timestamps
             try:
-                data = json.loads(text.strip())
+                data = orjson.loads(text.strip())
                 data['user_id'] = user_id
                 data['start_time'] = start_time.strftime("%Y-%m-%d %H:%M:%S")
                 data['end_time'] = end_time.strftime("%Y-%m-%d %H:%M:%S")
-                text = json.dumps(data, indent=2)
-            except json.JSONDecodeError:
+                text = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+            except orjson.JSONDecodeError:
                 pass
                 
             return text.strip()
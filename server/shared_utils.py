@@ -1,7 +1,12 @@
 import os
 import io
+import re
 import sys
 import json
+import orjson
+import functools
+import itertools
+import tempfile
 import zipfile
 import pandas as pd
 from datetime import datetime
@@ -11,119 +16,309 @@ from azure.storage.blob import BlobServiceClient
 # Load environment variables
 load_dotenv()
 
+# Legacy-format patterns, compiled once for the vectorized parser
+_PROC_EVENT_RE = re.compile(r"^proc_(start|end|title)")
+_KV_RE = re.compile(r"(\w+)=(\S+)")
+
 # Configuration
 AZURE_CONNECTION_STRING = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
 AZURE_CONTAINER_NAME = os.getenv('AZURE_CONTAINER_NAME', 'app-monitor-logs')
 
+@functools.lru_cache(maxsize=1)
 def get_container_client():
+    # Memoized: building a BlobServiceClient re-parses the connection string
+    # and sets up a fresh HTTP pipeline every time, which the polling callers
+    # paid on each cycle. The client is thread-safe and reusable.
     if not AZURE_CONNECTION_STRING:
         raise ValueError("AZURE_STORAGE_CONNECTION_STRING is not set")
     service = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
     return service.get_container_client(AZURE_CONTAINER_NAME)
 
-def download_and_parse_log(blob_name: str) -> str:
-    """Helper to download and parse log content from Azure Blob."""
+def download_and_parse_log(blob_name: str):
+    """Helper to download a zipped log from Azure Blob and stream its lines.
+
+    Yields the inner .log file line by line instead of materializing the
+    whole blob, the decompressed bytes, and the decoded text at once
+    (readall + read + decode tripled peak memory on multi-MB logs). The
+    zip itself goes through a spooled temp file, so small blobs stay in
+    memory and large ones spill to disk.
+    """
     container = get_container_client()
     blob_client = container.get_blob_client(blob_name)
-    
-    # Download blob into memory
-    download_stream = blob_client.download_blob()
-    zip_data = io.BytesIO(download_stream.readall())
-    
-    log_content = ""
-    
-    # Extract the zip
-    with zipfile.ZipFile(zip_data) as z:
-        file_list = z.namelist()
-        target_file = next((f for f in file_list if f.endswith('.log')), file_list[0] if file_list else None)
-        
-        if not target_file:
-            raise ValueError("No log file found inside the zip.")
-            
-        with z.open(target_file) as f:
-            log_content = f.read().decode('utf-8', errors='ignore')
-            
-    return log_content
+
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as zip_data:
+        download_stream = blob_client.download_blob()
+        for chunk in download_stream.chunks():
+            zip_data.write(chunk)
+        zip_data.seek(0)
+
+        # Extract the zip
+        with zipfile.ZipFile(zip_data) as z:
+            # Scan the central directory lazily and stop at the first .log
+            # entry; opening by ZipInfo also skips a second name lookup.
+            target = next((zi for zi in z.infolist() if zi.filename.endswith('.log')), None)
+            if target is None:
+                infos = z.infolist()
+                if not infos:
+                    raise ValueError("No log file found inside the zip.")
+                target = infos[0]
+
+            with z.open(target) as f:
+                yield from io.TextIOWrapper(f, encoding='utf-8', errors='ignore')
 
 def read_local_log(file_path: str) -> str:
     """Helper to read a local log file."""
     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
         return f.read()
 
-def parse_log_to_df(log_content: str) -> pd.DataFrame:
-    """Helper to parse raw log text into a DataFrame."""
-    data = []
-    lines = log_content.splitlines()
-    
-    for line in lines:
+# Below this many lines, the fixed cost of the pandas string pipeline
+# (column split, extractall, pivot, concat) exceeds a plain loop.
+_SMALL_LOG_LINES = 5000
+
+
+def _finalize_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Shared tail of both parse paths: categoricals and precomputed sets."""
+    for col in ('event', 'name', 'exe', 'page'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'page' in df.columns and 'url' in df.columns:
+        page_vals = df['page'].astype(str).values
+        url_vals = df['url'].astype(str).values
+        df.attrs['pages'] = sorted(set(page_vals[page_vals != ""]))
+        df.attrs['urls'] = sorted(set(url_vals[url_vals != ""]))
+    return df
+
+
+def _parse_small(raw) -> pd.DataFrame:
+    """Plain-Python parse for small logs, bypassing the pandas pipeline."""
+    ts_buf, event_buf, pid_buf, name_buf = [], [], [], []
+    exe_buf, page_buf, title_buf, url_buf = [], [], [], []
+    for line in raw:
+        parts = line.split(" | ", 2)
+        if len(parts) < 3:
+            continue
+        # Cheap shape checks reject malformed timestamps before any
+        # exception machinery runs; the remaining try only guards genuinely
+        # non-numeric digits, which are rare.
+        t = parts[0]
+        if len(t) < 19 or t[4] != '-' or t[7] != '-' or t[13] != ':' or t[16] != ':':
+            continue
         try:
-            # Fast split on first two pipes
-            parts = line.split(" | ", 2)
-            if len(parts) < 3:
-                continue
-                
-            timestamp_str = parts[0]
-            message = parts[2]
-            
-            # Fast timestamp parsing (assuming fixed format YYYY-MM-DD HH:MM:SS)
+            ts = datetime(int(t[0:4]), int(t[5:7]), int(t[8:10]),
+                          int(t[11:13]), int(t[14:16]), int(t[17:19]))
+        except ValueError:
+            continue
+        message = parts[2]
+        if message[:1] == '{':
             try:
-                # timestamp_str is "2025-12-13 10:00:00"
-                ts = datetime(
-                    int(timestamp_str[0:4]),
-                    int(timestamp_str[5:7]),
-                    int(timestamp_str[8:10]),
-                    int(timestamp_str[11:13]),
-                    int(timestamp_str[14:16]),
-                    int(timestamp_str[17:19])
-                )
-            except (ValueError, IndexError):
+                json_data = orjson.loads(message)
+            except orjson.JSONDecodeError:
+                continue
+            if json_data.get("event_type") != "active_window":
                 continue
-            
-            # Try parsing as JSON first (new format)
-            # Optimization: Check if it looks like JSON before trying to parse
-            if message.strip().startswith('{'):
-                try:
-                    json_data = json.loads(message)
-                    # Handle active_window event
-                    if json_data.get("event_type") == "active_window":
-                        data.append({
-                            "timestamp": ts,
-                            "event": "active",
-                            "pid": json_data.get("pid"),
-                            "name": json_data.get("name"),
-                            "exe": json_data.get("exe", ""),
-                            "page": json_data.get("page_title", ""),
-                            "window_title": json_data.get("window_title", ""),
-                            "url": json_data.get("url", "")
-                        })
-                        continue
-                except json.JSONDecodeError:
-                    pass
-            
-            # Fallback to old format parsing
-            if "proc_start" in line or "proc_end" in line:
-                attr_dict = {}
-                for part in message.split(" "):
-                    if "=" in part:
-                        k, v = part.split("=", 1)
-                        attr_dict[k] = v
-                
-                event_type = "start" if "proc_start" in line else "end"
-                
-                data.append({
-                    "timestamp": ts,
-                    "event": event_type,
-                    "pid": attr_dict.get("pid"),
-                    "name": attr_dict.get("name"),
-                    "exe": attr_dict.get("exe"),
-                    "page": attr_dict.get("page", ""),
-                    "window_title": attr_dict.get("window_title", ""),
-                    "url": ""
-                })
-        except Exception:
+            event = "active"
+            pid_buf.append(json_data.get("pid"))
+            name_buf.append(json_data.get("name"))
+            exe_buf.append(json_data.get("exe", ""))
+            page_buf.append(json_data.get("page_title", ""))
+            title_buf.append(json_data.get("window_title", ""))
+            url_buf.append(json_data.get("url", ""))
+        elif message.startswith(("proc_start", "proc_end", "proc_title")):
+            # proc_title is the deferred browser-title follow-up to a
+            # proc_start; keeping those rows is what feeds the page column.
+            attrs = dict(_KV_RE.findall(message))
+            event = message[5:].split(" ", 1)[0]
+            pid_buf.append(attrs.get("pid"))
+            name_buf.append(attrs.get("name"))
+            exe_buf.append(attrs.get("exe"))
+            page_buf.append(attrs.get("page", ""))
+            title_buf.append(attrs.get("window_title", ""))
+            url_buf.append("")
+        else:
             continue
-                
-    if not data:
+        ts_buf.append(ts)
+        event_buf.append(event)
+    if not ts_buf:
+        return pd.DataFrame()
+    return _finalize_df(pd.DataFrame({
+        "timestamp": ts_buf,
+        "event": event_buf,
+        "pid": pid_buf,
+        "name": name_buf,
+        "exe": exe_buf,
+        "page": page_buf,
+        "window_title": title_buf,
+        "url": url_buf,
+    }))
+
+
+def parse_log_to_df(log_content) -> pd.DataFrame:
+    """Helper to parse log text (a string or an iterable of lines) into a DataFrame.
+
+    The parse runs as pandas column operations -- one split, one
+    to_datetime, one regex extract for the legacy key=value format --
+    rather than a Python loop over every line, which was the dominant
+    CPU cost on large logs.
+    """
+    # No per-line rstrip copies and no intermediate big string: a trailing
+    # newline never matters here -- the timestamp parse, the first-byte JSON
+    # test and the \S+ key=value extraction are all insensitive to it.
+    # Size dispatch: peek at the head of the stream; small logs (the common
+    # case in the polling loops) go through the plain loop without the rest
+    # of the stream ever being buffered.
+    if isinstance(log_content, str):
+        raw = log_content.splitlines()
+        if len(raw) < _SMALL_LOG_LINES:
+            return _parse_small(raw)
+    else:
+        it = iter(log_content)
+        raw = list(itertools.islice(it, _SMALL_LOG_LINES))
+        if len(raw) < _SMALL_LOG_LINES:
+            return _parse_small(raw)
+        raw.extend(it)
+    lines = pd.Series(raw, dtype="object")
+    if lines.empty:
         return pd.DataFrame()
-        
-    return pd.DataFrame(data)
+
+    # One split into (timestamp, level, message) columns. regex=False keeps
+    # the delimiter literal; as a regex the "|" alternates on a bare space
+    # and shears the timestamp column apart.
+    parts = lines.str.split(" | ", n=2, expand=True, regex=False)
+    if parts.shape[1] < 3:
+        return pd.DataFrame()
+
+    # cache=True memoizes the string->datetime conversion, which pays off
+    # here because snapshot bursts emit many lines sharing one timestamp
+    ts = pd.to_datetime(parts[0], format="%Y-%m-%d %H:%M:%S", errors="coerce", cache=True)
+    msg = parts[2]
+    valid = ts.notna() & msg.notna()
+    ts = ts[valid]
+    msg = msg[valid]
+    if msg.empty:
+        return pd.DataFrame()
+
+    frames = []
+
+    # New format: JSON payloads (active_window events), gated by a
+    # first-character check so legacy lines never reach the JSON parser
+    json_mask = msg.str[0].eq("{")
+    if json_mask.any():
+        # Fill one buffer per column directly (structure-of-arrays) so the
+        # DataFrame is built from homogeneous lists with no dict-of-rows
+        # intermediate or per-key dtype inference.
+        json_index = []
+        pid_buf, name_buf, exe_buf = [], [], []
+        page_buf, title_buf, url_buf = [], [], []
+        for idx, m in msg[json_mask].items():
+            try:
+                json_data = orjson.loads(m)
+            except orjson.JSONDecodeError:
+                continue
+            if json_data.get("event_type") == "active_window":
+                json_index.append(idx)
+                pid_buf.append(json_data.get("pid"))
+                name_buf.append(json_data.get("name"))
+                exe_buf.append(json_data.get("exe", ""))
+                page_buf.append(json_data.get("page_title", ""))
+                title_buf.append(json_data.get("window_title", ""))
+                url_buf.append(json_data.get("url", ""))
+        if json_index:
+            frames.append(pd.DataFrame({
+                "timestamp": ts[json_index],
+                "event": "active",
+                "pid": pid_buf,
+                "name": name_buf,
+                "exe": exe_buf,
+                "page": page_buf,
+                "window_title": title_buf,
+                "url": url_buf,
+            }, index=json_index))
+
+    # Old format: "proc_start ..." / "proc_end ..." key=value messages, plus
+    # the proc_title follow-ups that carry a browser's page/window_title.
+    # The event word always leads the message, so a prefix test replaces the
+    # substring scan over the full line (which also misfired on messages that
+    # merely mention proc_start somewhere).
+    legacy_mask = ~json_mask & msg.str.startswith(("proc_start", "proc_end", "proc_title"))
+    if legacy_mask.any():
+        legacy_msg = msg[legacy_mask]
+        event = legacy_msg.str.extract(_PROC_EVENT_RE, expand=False)
+        kv_pairs = legacy_msg.str.extractall(_KV_RE)
+        if not kv_pairs.empty:
+            kv_table = kv_pairs.reset_index().pivot(index="level_0", columns=0, values=1)
+        else:
+            kv_table = pd.DataFrame(index=legacy_msg.index)
+        legacy_df = pd.DataFrame({"timestamp": ts[legacy_mask], "event": event})
+        for col, default in (("pid", None), ("name", None), ("exe", None), ("page", ""), ("window_title", "")):
+            if col in kv_table.columns:
+                legacy_df[col] = kv_table[col].reindex(legacy_df.index).fillna(default) if default is not None else kv_table[col].reindex(legacy_df.index)
+            else:
+                legacy_df[col] = default
+        legacy_df["url"] = ""
+        frames.append(legacy_df[legacy_df["event"].notna()])
+
+    if not frames:
+        return pd.DataFrame()
+
+    # Keep original line order via the shared line index
+    return _finalize_df(pd.concat(frames).sort_index().reset_index(drop=True))
+
+
+def load_log_df(source, is_local: bool = False) -> pd.DataFrame:
+    """Fetch a log (Azure blob or local file) and parse it in one step.
+
+    Both sources feed the parser as a line iterator, so no full-file string
+    is ever materialized.
+    """
+    if is_local:
+        with open(source, 'r', encoding='utf-8', errors='ignore') as f:
+            return parse_log_to_df(f)
+    return parse_log_to_df(download_and_parse_log(source))
+
+
+def summarize_df(df: pd.DataFrame, source: str, event_kind: str = 'start') -> str:
+    """Build the productivity summary text from an already-parsed DataFrame.
+
+    Shared by the MCP analyzer and GeminiService so a caller that wants both
+    the basic summary and the AI report downloads and parses the log once.
+    """
+    start_time = df['timestamp'].min()
+    end_time = df['timestamp'].max()
+    duration = end_time - start_time
+    # Top-20 straight from value_counts (fast on the categorical codes);
+    # to_markdown pulled in tabulate and formatted every distinct app, which
+    # also bloated the prompt sent to Gemini. Grouping once on the categorical
+    # event codes replaces a full-length boolean mask + filtered copy per call.
+    try:
+        event_names = df.groupby('event', sort=False, observed=True)['name'].get_group(event_kind)
+    except KeyError:
+        event_names = pd.Series([], dtype=object)
+    top_apps = event_names.value_counts().head(20)
+    apps_block = "\n".join(f"{name}\t{count}" for name, count in top_apps.items())
+    # Prefer the sets precomputed at parse time; fall back to a column scan
+    # for frames that didn't come from parse_log_to_df.
+    browser_pages = df.attrs.get('pages')
+    if browser_pages is None:
+        browser_pages = df[df['page'] != ""]['page'].unique()
+    urls = df.attrs.get('urls')
+    if urls is None:
+        urls = df[df['url'] != ""]['url'].unique()
+
+    return f"""
+Productivity Analysis for {source}
+-------------------------------------
+Session Start: {start_time}
+Session End:   {end_time}
+Total Duration: {duration}
+
+Top Applications Launched:
+{apps_block if apps_block else "None detected"}
+
+Browser Pages Visited:
+{', '.join(browser_pages) if len(browser_pages) > 0 else "None detected"}
+
+URLs Visited:
+{', '.join(urls) if len(urls) > 0 else "None detected"}
+
+Raw Event Count: {len(df)}
+"""
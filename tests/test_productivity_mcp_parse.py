@@ -0,0 +1,35 @@
+from productivity_mcp import parse_log_to_df
+
+# One log in each format the monitor emits: legacy key=value process events,
+# a proc_title follow-up, and a JSON active_window event.
+SAMPLE_LOG = "\n".join([
+    "2025-12-13 10:00:00 | INFO | proc_start pid=123 name=chrome.exe exe=C:\\chrome.exe user=bob started_at=2025-12-13",
+    "2025-12-13 10:00:01 | INFO | proc_title pid=123 name=chrome.exe page=Inbox window_title=Inbox",
+    '2025-12-13 10:00:05 | INFO | {"event_type": "active_window", "pid": 123, "name": "chrome.exe", "window_title": "Inbox - Google Chrome", "page_title": "Inbox"}',
+    "2025-12-13 10:05:00 | INFO | proc_end pid=123 name=chrome.exe exe=C:\\chrome.exe user=bob",
+])
+
+
+def test_parses_known_good_log():
+    df = parse_log_to_df(SAMPLE_LOG)
+    assert len(df) == 4
+    assert df["timestamp"].notna().all()
+    assert set(df["event"]) == {"start", "title", "active", "end"}
+    assert (df["name"] == "chrome.exe").all()
+
+
+def test_timestamps_survive_the_split():
+    # Guards the literal " | " delimiter: a regex split breaks the timestamp
+    # column and coerces every row to NaT, yielding an empty frame.
+    df = parse_log_to_df(SAMPLE_LOG)
+    assert str(df["timestamp"].iloc[0]) == "2025-12-13 10:00:00"
+    assert str(df["timestamp"].iloc[-1]) == "2025-12-13 10:05:00"
+
+
+def test_page_column_carries_browser_pages():
+    df = parse_log_to_df(SAMPLE_LOG)
+    assert "Inbox" in set(df["page"].astype(str))
+
+
+def test_empty_input_yields_empty_frame():
+    assert parse_log_to_df("").empty
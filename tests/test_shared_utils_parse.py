@@ -0,0 +1,36 @@
+from server.shared_utils import _SMALL_LOG_LINES, parse_log_to_df
+
+
+def _legacy_line(i):
+    return f"2025-12-13 10:00:00 | INFO | proc_start pid={i} name=app.exe exe=C:\\app.exe user=bob"
+
+
+def test_small_log_fast_path():
+    lines = [_legacy_line(i) for i in range(10)]
+    df = parse_log_to_df("\n".join(lines))
+    assert len(df) == 10
+    assert (df["event"] == "start").all()
+
+
+def test_vectorized_branch_parses_large_log():
+    # At or above _SMALL_LOG_LINES the pandas pipeline takes over; this is
+    # the branch where a regex split (instead of the literal " | "
+    # delimiter) silently produced an empty frame for every large log.
+    n = _SMALL_LOG_LINES + 500
+    lines = [_legacy_line(i) for i in range(n)]
+    df = parse_log_to_df("\n".join(lines))
+    assert len(df) == n
+    assert df["timestamp"].notna().all()
+    assert str(df["timestamp"].iloc[0]) == "2025-12-13 10:00:00"
+    assert (df["event"] == "start").all()
+    assert (df["name"] == "app.exe").all()
+
+
+def test_vectorized_branch_handles_mixed_formats():
+    n = _SMALL_LOG_LINES + 10
+    lines = [_legacy_line(i) for i in range(n)]
+    lines.append('2025-12-13 10:00:05 | INFO | {"event_type": "active_window", "pid": 1, "name": "chrome.exe", "window_title": "Inbox - Google Chrome", "page_title": "Inbox"}')
+    df = parse_log_to_df("\n".join(lines))
+    assert len(df) == n + 1
+    assert set(df["event"]) == {"start", "active"}
+    assert "Inbox" in df.attrs["pages"]
@@ -1,7 +1,10 @@
 import argparse
+import concurrent.futures
+from dataclasses import dataclass, field
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 import time
 import json
 from datetime import datetime
@@ -16,6 +19,31 @@ from typing import Set
 user32 = ctypes.windll.user32  # type: ignore[attr-defined]
 kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
 
+# WinEvent constants for SetWinEventHook-based foreground tracking
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+QS_ALLINPUT = 0x04FF
+PM_REMOVE = 0x0001
+
+# WinEvent constants for incremental top-level window tracking
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+GA_ROOT = 2
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(
+    None,
+    wintypes.HANDLE,
+    wintypes.DWORD,
+    wintypes.HWND,
+    wintypes.LONG,
+    wintypes.LONG,
+    wintypes.DWORD,
+    wintypes.DWORD,
+)
+
 # Default set of noisy process names to ignore to reduce log noise. You can
 # adjust this list or use `--whitelist` / `--gui-only` when running the script.
 DEFAULT_IGNORE_NAMES: Set[str] = {
@@ -31,12 +59,66 @@ DEFAULT_IGNORE_NAMES: Set[str] = {
     "sh.exe",
 }
 
+# Hot-path lookup tables, built once instead of per event: browser names we
+# extract page titles for, Chromium names with multi-process children, and
+# the title suffixes browsers append (a tuple so endswith is one C call).
+_BROWSER_NAMES = frozenset({"chrome.exe", "msedge.exe", "brave.exe", "firefox.exe"})
+_CHROMIUM_NAMES = frozenset({"chrome.exe", "msedge.exe", "brave.exe", "msedgewebview2.exe"})
+_BROWSER_SUFFIXES = (" - Google Chrome", " - Microsoft Edge", " - Brave", " - Mozilla Firefox")
+
+@dataclass
+class SharedState:
+    """pid -> name view shared between the process and active-app monitors.
+
+    In --mode both, monitor_processes already knows every process name from
+    its snapshot; publishing them here lets the active-app monitor resolve
+    the foreground PID without its own psutil query.
+    """
+
+    pid_name_map: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+# Cache of psutil.Process handles keyed by PID for foreground resolution.
+# Alt-tabbing revisits the same few apps over and over, so a hit turns the
+# cross-process name query into a dict lookup. Entries are validated with
+# is_running() (create_time comparison) so a reused PID can't serve a stale
+# name, and dead PIDs are swept out once the cache grows past the cap.
+_proc_cache: dict[int, tuple] = {}
+_PROC_CACHE_SWEEP_AT = 256
+
+
+def _sweep_proc_cache():
+    """Drop cached Process handles whose PIDs no longer exist."""
+    live = set(psutil.pids())
+    for pid in list(_proc_cache):
+        if pid not in live:
+            del _proc_cache[pid]
+
+
+# Reusable per-thread title buffer: window titles almost always fit in 512
+# wchars, and passing a fixed buffer to GetWindowTextW collapses the usual
+# length query + heap buffer + fetch sequence (two cross-process RPCs and an
+# allocation) into a single call.
+_title_tls = threading.local()
 
-def get_active_window_info():
+
+def _get_window_text(hwnd) -> str | None:
+    """Fetch a window's title with one GetWindowTextW call, or None if empty."""
+    buf = getattr(_title_tls, "buf", None)
+    if buf is None:
+        buf = _title_tls.buf = ctypes.create_unicode_buffer(512)
+    n = user32.GetWindowTextW(hwnd, buf, 512)
+    return buf.value if n > 0 else None
+
+
+def get_active_window_info(shared: SharedState | None = None):
     """
     Return a tuple (pid, process_name, window_title) for the current foreground window.
 
     If any value can't be retrieved, provide best-effort fallbacks and avoid raising.
+    When a SharedState from monitor_processes is supplied, its snapshot names
+    are consulted first so no separate psutil query is needed.
     """
     try:
         hwnd = user32.GetForegroundWindow()
@@ -48,23 +130,35 @@ def get_active_window_info():
         user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
         pid_value = pid.value if pid.value != 0 else None
 
-        # Get window title
-        length = user32.GetWindowTextLengthW(hwnd)
-        if length > 0:
-            buf = ctypes.create_unicode_buffer(length + 1)
-            user32.GetWindowTextW(hwnd, buf, length + 1)
-            title = buf.value
-        else:
-            title = None
-
-        # Resolve process name
+        # Get window title (single call into the per-thread buffer)
+        title = _get_window_text(hwnd)
+
+        # Resolve process name: try the process monitor's shared snapshot
+        # first, then our own cached handle.
         name = None
-        if pid_value is not None:
-            try:
-                p = psutil.Process(pid_value)
-                name = p.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                name = None
+        if pid_value is not None and shared is not None:
+            with shared.lock:
+                name = shared.pid_name_map.get(pid_value)
+        if pid_value is not None and name is None:
+            cached = _proc_cache.get(pid_value)
+            if cached is not None:
+                proc, cached_name = cached
+                try:
+                    if proc.is_running():
+                        name = cached_name
+                    else:
+                        del _proc_cache[pid_value]
+                except psutil.Error:
+                    del _proc_cache[pid_value]
+            if name is None:
+                try:
+                    p = psutil.Process(pid_value)
+                    name = p.name()
+                    _proc_cache[pid_value] = (p, name)
+                    if len(_proc_cache) > _PROC_CACHE_SWEEP_AT:
+                        _sweep_proc_cache()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    name = None
 
         return (pid_value, name, title)
     except Exception:
@@ -72,16 +166,72 @@ def get_active_window_info():
         return (None, None, None)
 
 
-def configure_logger(log_path: str, max_bytes: int = 1_000_000, backups: int = 5, also_stdout: bool = False) -> logging.Logger:
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that batches flushes instead of flushing per record.
+
+    The stream is opened with a 128 KB buffer and flushed every
+    _FLUSH_EVERY records or _FLUSH_SECS seconds, whichever comes first,
+    so steady logging costs one write syscall per batch rather than one
+    per line. Rotation closes the stream, which flushes implicitly.
     """
-    Configure a rotating file logger.
+
+    _FLUSH_EVERY = 64
+    _FLUSH_SECS = 2.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._records_since_flush = 0
+        self._last_flush = time.monotonic()
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=131072, encoding=self.encoding, errors=self.errors)
+
+    def flush(self):
+        self._records_since_flush = 0
+        self._last_flush = time.monotonic()
+        super().flush()
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record)
+            self.stream.write(msg + self.terminator)
+            self._records_since_flush += 1
+            if (
+                self._records_since_flush >= self._FLUSH_EVERY
+                or time.monotonic() - self._last_flush >= self._FLUSH_SECS
+            ):
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logger(log_path: str, max_bytes: int = 1_000_000, backups: int = 5, also_stdout: bool = False, rotate: bool = True) -> tuple[logging.Logger, QueueListener]:
+    """
+    Configure a rotating file logger behind a queue.
+
+    The monitor threads only enqueue records (microseconds); a QueueListener
+    thread does the actual file write and rotation, so a slow or stalled disk
+    never blocks window/process detection.
 
     - log_path: path to log file
     - max_bytes: rotate when exceeding this size
     - backups: number of backup files to keep
     - also_stdout: mirror logs to console
+    - rotate: use the rotating handler; False writes a single plain file
+
+    Returns (logger, listener); call listener.stop() on shutdown to flush.
     """
-    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    # Only create the directory when the path actually has one and it's
+    # missing; the default bare filename lands in the CWD and needs no stat.
+    log_dir = os.path.dirname(log_path)
+    if log_dir and not os.path.isdir(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
 
     logger = logging.getLogger("active_apps_monitor")
     logger.setLevel(logging.INFO)
@@ -89,35 +239,68 @@ def configure_logger(log_path: str, max_bytes: int = 1_000_000, backups: int = 5
 
     fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
-    file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    if rotate:
+        file_handler: logging.Handler = BufferedRotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    else:
+        file_handler = logging.FileHandler(log_path, encoding="utf-8")
     file_handler.setFormatter(fmt)
-    logger.addHandler(file_handler)
 
+    handlers = [file_handler]
     if also_stdout:
         sh = logging.StreamHandler()
         sh.setFormatter(fmt)
-        logger.addHandler(sh)
+        handlers.append(sh)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
 
-    return logger
+    return logger, listener
 
 
-def monitor_active_app(interval: float, logger: logging.Logger, heartbeat_seconds: float | None = 300.0):
+def _emit_active_window(logger: logging.Logger, pid, name, title):
+    """Build and log the active_window event for the current foreground app.
+
+    No timestamp field: the formatter's asctime already stamps every record,
+    so computing datetime.now().strftime here would just duplicate it.
     """
-    Monitor changes to the foreground application and log when they change.
+    name_s = name if name else "?"
+    title_s = title if title else "?"
 
-    - interval: polling interval in seconds
-    - heartbeat_seconds: if set, re-log current app at this cadence even if unchanged
-    
-    For browsers (Chrome, Edge, etc.), the window title often contains the page title
-    and URL information, which helps track which websites are being visited.
+    log_data = {
+        "event_type": "active_window",
+        "pid": pid,
+        "name": name_s,
+        "window_title": title_s
+    }
+
+    # For browser windows, the title often contains valuable info about the webpage
+    # Format: "Page Title - Google Chrome" or "Page Title - Microsoft Edge"
+    is_browser = name_s.lower() in _BROWSER_NAMES
+
+    if is_browser and title_s != "?":
+        # Extract page title (remove " - Google Chrome" suffix etc.)
+        page_title = title_s
+        if page_title.endswith(_BROWSER_SUFFIXES):
+            page_title = page_title.rsplit(" - ", 1)[0]
+        log_data["page_title"] = page_title
+
+    logger.info(json.dumps(log_data))
+
+
+def _monitor_active_app_poll(interval: float, logger: logging.Logger, heartbeat_seconds: float | None = 300.0, stop_event: threading.Event | None = None, shared: SharedState | None = None):
+    """
+    Polling fallback for monitor_active_app: sample the foreground window every
+    `interval` seconds and log when it changes.
     """
     last = (None, None, None)
     last_heartbeat = time.monotonic()
 
-    logger.info("monitor_active_start interval=%.2fs" % interval)
+    logger.info("monitor_active_start mode=poll interval=%.2fs", interval)
     try:
-        while True:
-            pid, name, title = get_active_window_info()
+        while stop_event is None or not stop_event.is_set():
+            pid, name, title = get_active_window_info(shared)
             current = (pid, name, title)
 
             now = time.monotonic()
@@ -127,41 +310,124 @@ def monitor_active_app(interval: float, logger: logging.Logger, heartbeat_second
                 last_heartbeat = now
 
             if current != last or heartbeat_due:
-                ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                pid_s = str(pid) if pid is not None else "?"
-                name_s = name if name else "?"
-                title_s = title if title else "?"
-                
-                log_data = {
-                    "event_type": "active_window",
-                    "pid": pid,
-                    "name": name_s,
-                    "window_title": title_s,
-                    "timestamp": ts
-                }
-                
-                # For browser windows, the title often contains valuable info about the webpage
-                # Format: "Page Title - Google Chrome" or "Page Title - Microsoft Edge"
-                is_browser = name_s.lower() in {"chrome.exe", "msedge.exe", "brave.exe", "firefox.exe"}
-                
-                if is_browser and title_s != "?":
-                    # Extract page title (remove " - Google Chrome" suffix etc.)
-                    page_title = title_s
-                    for browser_suffix in [" - Google Chrome", " - Microsoft Edge", " - Brave", " - Mozilla Firefox"]:
-                        if page_title.endswith(browser_suffix):
-                            page_title = page_title[:-len(browser_suffix)]
-                            break
-                    log_data["page_title"] = page_title
-                
-                logger.info(json.dumps(log_data))
-                
+                _emit_active_window(logger, pid, name, title)
                 last = current
 
             time.sleep(max(0.1, float(interval)))
+        logger.info("monitor_active_stop reason=stop_event")
+    except KeyboardInterrupt:
+        logger.info("monitor_active_stop reason=keyboard_interrupt")
+    except Exception as e:
+        logger.exception("monitor_active_crash %s", e)
+
+
+def monitor_active_app(interval: float, logger: logging.Logger, heartbeat_seconds: float | None = 300.0, stop_event: threading.Event | None = None, poll: bool = False, shared: SharedState | None = None, debounce_ms: float = 150.0):
+    """
+    Monitor changes to the foreground application and log when they change.
+
+    By default this registers a WinEvent hook for EVENT_SYSTEM_FOREGROUND and
+    sleeps in a message pump until Windows notifies us of a change — near-zero
+    idle CPU and no detection latency. Pass poll=True (or --poll on the CLI)
+    for the old fixed-interval sampling loop.
+
+    - interval: polling interval in seconds (poll mode only)
+    - heartbeat_seconds: if set, re-log current app at this cadence even if unchanged
+    - stop_event: if set, the loop exits cleanly when the event is signalled
+    - debounce_ms: settle time before logging a foreground change, so
+      alt-tabbing through several windows only logs the one landed on;
+      0 logs every event immediately
+
+    For browsers (Chrome, Edge, etc.), the window title often contains the page title
+    and URL information, which helps track which websites are being visited.
+    """
+    if poll:
+        return _monitor_active_app_poll(interval, logger, heartbeat_seconds=heartbeat_seconds, stop_event=stop_event, shared=shared)
+
+    state = {"last": (None, None, None)}
+
+    def _log_current(force=False):
+        pid, name, title = get_active_window_info(shared)
+        current = (pid, name, title)
+        if current != state["last"] or force:
+            _emit_active_window(logger, pid, name, title)
+            state["last"] = current
+
+    # Debounce state: rapid foreground bursts (alt-tab cycling) restart the
+    # timer, so only the window the user settles on pays for resolve + log.
+    debounce_s = max(0.0, float(debounce_ms or 0.0) / 1000.0)
+    debounce_timer: threading.Timer | None = None
+    debounce_lock = threading.Lock()
+
+    def _on_foreground(hook, event, hwnd, id_object, id_child, event_thread, event_time):
+        # Called by the message pump on every foreground change
+        nonlocal debounce_timer
+        try:
+            if debounce_s <= 0:
+                _log_current()
+                return
+            with debounce_lock:
+                if debounce_timer is not None:
+                    debounce_timer.cancel()
+                debounce_timer = threading.Timer(debounce_s, _log_current)
+                debounce_timer.daemon = True
+                debounce_timer.start()
+        except Exception:
+            pass
+
+    # Keep a reference to the callback for the lifetime of the hook so ctypes
+    # doesn't garbage-collect the trampoline out from under Windows.
+    event_cb = WINEVENTPROC(_on_foreground)
+    hook = user32.SetWinEventHook(
+        EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, event_cb, 0, 0, WINEVENT_OUTOFCONTEXT
+    )
+    if not hook:
+        # Hook registration can fail in restricted sessions; fall back to polling
+        logger.info("monitor_active_fallback reason=hook_failed")
+        return _monitor_active_app_poll(interval, logger, heartbeat_seconds=heartbeat_seconds, stop_event=stop_event, shared=shared)
+
+    logger.info("monitor_active_start mode=events")
+
+    # Heartbeat re-logs run on a self-rescheduling timer, independent of events
+    heartbeat_timer = None
+    if heartbeat_seconds:
+        def _heartbeat():
+            nonlocal heartbeat_timer
+            try:
+                _log_current(force=True)
+            except Exception:
+                pass
+            heartbeat_timer = threading.Timer(heartbeat_seconds, _heartbeat)
+            heartbeat_timer.daemon = True
+            heartbeat_timer.start()
+
+        heartbeat_timer = threading.Timer(heartbeat_seconds, _heartbeat)
+        heartbeat_timer.daemon = True
+        heartbeat_timer.start()
+
+    try:
+        # Log whatever is foreground right now, then pump messages. WinEvent
+        # callbacks are delivered through this pump; the wait wakes every
+        # 250 ms so stop_event is still honored when no events arrive.
+        _log_current(force=True)
+        msg = wintypes.MSG()
+        while stop_event is None or not stop_event.is_set():
+            res = user32.MsgWaitForMultipleObjects(0, None, False, 250, QS_ALLINPUT)
+            if res == 0:
+                while user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, PM_REMOVE):
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+        logger.info("monitor_active_stop reason=stop_event")
     except KeyboardInterrupt:
         logger.info("monitor_active_stop reason=keyboard_interrupt")
     except Exception as e:
         logger.exception("monitor_active_crash %s", e)
+    finally:
+        if heartbeat_timer is not None:
+            heartbeat_timer.cancel()
+        with debounce_lock:
+            if debounce_timer is not None:
+                debounce_timer.cancel()
+        user32.UnhookWinEvent(hook)
 
 
 def _is_system_process(pid: int | None, name: str | None, username: str | None) -> bool:
@@ -177,62 +443,233 @@ def _is_system_process(pid: int | None, name: str | None, username: str | None)
 
 
 def _get_process_snapshot(include_system: bool):
-    """Return dict pid -> (name, create_time, username)."""
+    """Return dict pid -> (name, name_lc, create_time, username).
+
+    name_lc is the lowercased name, computed once here so the ignore/
+    whitelist/browser checks downstream don't re-lowercase per comparison.
+
+    Per-process attributes are read inside oneshot(), which batches the
+    separate NtQuery calls Windows would otherwise issue for each attribute
+    into a single query — roughly halving snapshot time on busy machines.
+    """
     snapshot = {}
-    for p in psutil.process_iter(["pid", "name", "create_time", "username"]):
+    for p in psutil.process_iter():
         try:
-            pid = p.info.get("pid")
-            name = p.info.get("name")
-            ctime = p.info.get("create_time")
-            user = p.info.get("username")
+            with p.oneshot():
+                pid = p.pid
+                name = p.name()
+                ctime = p.create_time()
+                user = p.username()
             if not include_system and _is_system_process(pid, name, user):
                 continue
-            if pid is not None:
-                snapshot[pid] = (name, ctime, user)
+            snapshot[pid] = (name, (name or "").lower(), ctime, user)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
     return snapshot
 
 
-def _get_top_level_window_pids() -> set:
-    """Return a set of PIDs that own visible top-level windows.
+def _fast_proc_names() -> dict:
+    """Return dict pid -> exe basename via EnumProcesses + QueryFullProcessImageNameW.
 
-    Uses EnumWindows + GetWindowThreadProcessId + IsWindowVisible. This helps
-    identify GUI applications versus short-lived console/helper processes.
+    psutil's process_iter pays for its cross-platform abstraction with
+    Python-level Process construction and several syscalls per PID. When all
+    we need is pid + name, one EnumProcesses call plus a limited-information
+    OpenProcess/QueryFullProcessImageNameW per PID is far cheaper.
     """
-    pids = set()
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    names: dict = {}
+    try:
+        psapi = ctypes.windll.psapi  # type: ignore[attr-defined]
+        arr = (wintypes.DWORD * 4096)()
+        needed = wintypes.DWORD()
+        if not psapi.EnumProcesses(arr, ctypes.sizeof(arr), ctypes.byref(needed)):
+            return names
+        buf = ctypes.create_unicode_buffer(260)
+        for pid in arr[: needed.value // 4]:
+            if not pid:
+                continue
+            handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not handle:
+                continue
+            try:
+                size = wintypes.DWORD(260)
+                if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                    names[pid] = os.path.basename(buf.value)
+            finally:
+                kernel32.CloseHandle(handle)
+    except Exception:
+        # Fall back to empty; callers treat that as "use the psutil path"
+        return {}
+    return names
 
-    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
 
-    def _callback(hwnd, lParam):
-        try:
-            # Only consider visible windows with non-empty titles
-            if not user32.IsWindowVisible(hwnd):
-                return True
-            length = user32.GetWindowTextLengthW(hwnd)
-            # Skip windows with no title (often not user-facing)
-            if length == 0:
-                return True
-            pid = wintypes.DWORD()
-            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-            if pid.value:
-                pids.add(pid.value)
-        except Exception:
-            # Don't let window API errors stop enumeration
-            pass
-        return True
+def _fetch_proc_info(pid: int):
+    """Fetch (name, name_lc, create_time, username) for one PID, or None if it's gone."""
+    try:
+        p = psutil.Process(pid)
+        with p.oneshot():
+            name = p.name()
+            return (name, (name or "").lower(), p.create_time(), p.username())
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+# Enum callbacks are defined once at module scope: wrapping a Python function
+# in WNDENUMPROC allocates a fresh ctypes trampoline, which is wasteful on a
+# per-poll hot path. Accumulator state lives in a threading.local so
+# concurrent enumerations (monitor thread vs. title-fetch pool) don't clash.
+_WNDENUMPROC_TYPE = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+_enum_tls = threading.local()
+
+
+def _enum_pids_callback(hwnd, lParam):
+    try:
+        # Only consider visible windows with non-empty titles
+        if not user32.IsWindowVisible(hwnd):
+            return True
+        length = user32.GetWindowTextLengthW(hwnd)
+        # Skip windows with no title (often not user-facing)
+        if length == 0:
+            return True
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value:
+            _enum_tls.hwnd_pids[hwnd] = pid.value
+    except Exception:
+        # Don't let window API errors stop enumeration
+        pass
+    return True
+
+
+_ENUM_PIDS_CB = _WNDENUMPROC_TYPE(_enum_pids_callback)
+
+
+def _enum_title_callback(hwnd, lParam):
+    try:
+        if not user32.IsWindowVisible(hwnd):
+            return True
+        title = _get_window_text(hwnd)
+        if title:
+            _enum_tls.found_title = title
+            return False  # Stop enumeration, we found it
+    except Exception:
+        pass
+    return True
+
+
+_ENUM_TITLE_CB = _WNDENUMPROC_TYPE(_enum_title_callback)
+
 
-    enum_cb = WNDENUMPROC(_callback)
+def _enum_hwnd_pids() -> dict:
+    """Return a dict hwnd -> pid for visible, titled top-level windows.
+
+    Full EnumWindows walk; used to bootstrap the WinEvent tracker and as a
+    fallback when event hooks can't be registered.
+    """
+    _enum_tls.hwnd_pids = {}
     try:
-        user32.EnumWindows(enum_cb, 0)
+        user32.EnumWindows(_ENUM_PIDS_CB, 0)
     except Exception:
         # EnumWindows can sometimes fail under restricted contexts; ignore
         pass
+    return _enum_tls.hwnd_pids
+
+
+# hwnd -> pid map maintained incrementally by WinEvent hooks so gui_only
+# polling doesn't have to re-enumerate every window each interval.
+_hwnd_pids: dict = {}
+_hwnd_pids_lock = threading.Lock()
+_winevent_thread: threading.Thread | None = None
+_winevent_hooks_ok = False
+_winevent_ready = threading.Event()
+
+
+def _on_window_event(hook, event, hwnd, id_object, id_child, event_thread, event_time):
+    """WinEvent callback: fold window show/hide/destroy deltas into _hwnd_pids."""
+    try:
+        if id_object != OBJID_WINDOW or id_child != 0:
+            return
+        if event in (EVENT_OBJECT_HIDE, EVENT_OBJECT_DESTROY):
+            with _hwnd_pids_lock:
+                _hwnd_pids.pop(hwnd, None)
+            return
+        # SHOW / NAMECHANGE: track only visible, titled, top-level windows
+        if user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+            return
+        if not user32.IsWindowVisible(hwnd) or user32.GetWindowTextLengthW(hwnd) == 0:
+            return
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value:
+            with _hwnd_pids_lock:
+                _hwnd_pids[hwnd] = pid.value
+    except Exception:
+        # Never let a callback error kill the pump
+        pass
+
+
+# Module-scope reference keeps the ctypes trampoline alive for the hooks
+_window_event_cb = WINEVENTPROC(_on_window_event)
+
+
+def _winevent_pump():
+    """Register the window-tracking hooks and pump their messages forever."""
+    global _winevent_hooks_ok
+    hooks = []
+    # One narrow hook per event; WinEvents are delivered through this
+    # thread's message queue (WINEVENT_OUTOFCONTEXT).
+    for event in (EVENT_OBJECT_SHOW, EVENT_OBJECT_HIDE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_NAMECHANGE):
+        h = user32.SetWinEventHook(event, event, 0, _window_event_cb, 0, 0, WINEVENT_OUTOFCONTEXT)
+        if h:
+            hooks.append(h)
+    if not hooks:
+        _winevent_ready.set()
+        return
+
+    # Bootstrap after the hooks are live so no window slips through the gap
+    snapshot = _enum_hwnd_pids()
+    with _hwnd_pids_lock:
+        _hwnd_pids.update(snapshot)
+    _winevent_hooks_ok = True
+    _winevent_ready.set()
+
+    msg = wintypes.MSG()
+    while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+        user32.TranslateMessage(ctypes.byref(msg))
+        user32.DispatchMessageW(ctypes.byref(msg))
+
+
+def _ensure_winevent_tracker():
+    """Start the window-tracking pump thread on first use."""
+    global _winevent_thread
+    if _winevent_thread is None or not _winevent_thread.is_alive():
+        _winevent_thread = threading.Thread(target=_winevent_pump, daemon=True, name="winevent-tracker")
+        _winevent_thread.start()
+        _winevent_ready.wait(timeout=2.0)
+
+
+def _get_top_level_window_pids() -> set:
+    """Return a set of PIDs that own visible top-level windows.
+
+    Served from the hwnd -> pid map the WinEvent hooks keep current, so
+    per-interval callers copy a small dict instead of enumerating every
+    window in the session. Falls back to a direct EnumWindows walk when
+    the hooks can't be registered.
+    """
+    _ensure_winevent_tracker()
+    if _winevent_hooks_ok:
+        with _hwnd_pids_lock:
+            return set(_hwnd_pids.values())
+    return set(_enum_hwnd_pids().values())
 
-    return pids
 
+# Memoized main-vs-child verdicts keyed by (pid, create_time): reading a
+# command line means opening the process and walking its PEB, and Chromium
+# browsers spawn dozens of child PIDs that would each pay that cost.
+_browser_type_cache: dict = {}
 
-def _is_main_browser_process(pid: int, name: str) -> bool:
+
+def _is_main_browser_process(pid: int, name_lc: str, create_time: float | None = None) -> bool:
     """Return True if this is a main browser process, False if it's a child/helper.
 
     Chrome/Edge/Brave use multi-process architecture. Child processes have
@@ -240,70 +677,85 @@ def _is_main_browser_process(pid: int, name: str) -> bool:
     browser process (the one the user launched) typically has no --type flag
     or has --type=browser (rare).
 
-    For non-browser processes, always returns True (treat as main).
+    For non-browser processes, always returns True (treat as main). Results
+    are cached by (pid, create_time); callers should pass the create_time
+    they already have from the snapshot and evict the entry on proc_end.
     """
     # Only apply this logic to known Chromium-based browsers
-    if name.lower() not in {"chrome.exe", "msedge.exe", "brave.exe", "msedgewebview2.exe"}:
+    # (name_lc is already lowercased by the caller)
+    if name_lc not in _CHROMIUM_NAMES:
         return True  # not a browser we recognize, treat as main
 
+    cache_key = (pid, create_time) if create_time is not None else None
+    if cache_key is not None:
+        cached = _browser_type_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
         p = psutil.Process(pid)
         cmdline = p.cmdline()
         # Check for --type= flags (child processes have these)
+        result = True
         for arg in cmdline:
             if arg.startswith("--type="):
-                # --type=browser is the main process (rare but valid)
-                if arg == "--type=browser":
-                    return True
-                # Any other --type means it's a child process
-                return False
-        # No --type flag found → this is the main browser process
-        return True
+                # --type=browser is the main process (rare but valid);
+                # any other --type means it's a child process
+                result = arg == "--type=browser"
+                break
+        if cache_key is not None:
+            _browser_type_cache[cache_key] = result
+        return result
     except (psutil.NoSuchProcess, psutil.AccessDenied, Exception):
         # Can't determine, assume it's main to avoid missing launches
         return True
 
 
 def _get_window_title_for_pid(pid: int) -> str | None:
-    """Try to find a window title for a given PID by enumerating all windows.
+    """Try to find a window title for a given PID by enumerating its threads.
     
     This is useful for getting browser page titles when a process starts.
-    Returns None if no window title found or if errors occur.
+    EnumThreadWindows only walks windows owned by the target process's
+    threads, so we never touch the hundreds of unrelated windows a full
+    EnumWindows pass would visit (and can skip the per-window PID query
+    entirely). Returns None if no window title found or if errors occur.
     """
-    found_title = None
-    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    _enum_tls.found_title = None
+    try:
+        for t in psutil.Process(pid).threads():
+            user32.EnumThreadWindows(t.id, _ENUM_TITLE_CB, 0)
+            if _enum_tls.found_title:
+                break
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    except Exception:
+        pass
 
-    def _callback(hwnd, lParam):
-        nonlocal found_title
-        try:
-            if not user32.IsWindowVisible(hwnd):
-                return True
-            
-            # Get PID for this window
-            window_pid = wintypes.DWORD()
-            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
-            
-            if window_pid.value == pid:
-                # Get window title
-                length = user32.GetWindowTextLengthW(hwnd)
-                if length > 0:
-                    buf = ctypes.create_unicode_buffer(length + 1)
-                    user32.GetWindowTextW(hwnd, buf, length + 1)
-                    if buf.value:
-                        found_title = buf.value
-                        return False  # Stop enumeration, we found it
-        except Exception:
-            pass
-        return True
+    return _enum_tls.found_title
 
-    enum_cb = WNDENUMPROC(_callback)
+
+# Browser title fetches sleep 0.5s waiting for the window; run them off-loop
+# so a burst of browser starts can't stall process detection.
+_title_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="title-fetch")
+
+
+def _resolve_and_log_title(pid: int, name_s: str, logger: logging.Logger):
+    """Wait for a freshly started browser's window and log its title."""
     try:
-        user32.EnumWindows(enum_cb, 0)
+        # Give the browser a moment to create its window
+        time.sleep(0.5)
+        window_title = _get_window_title_for_pid(pid)
+        if not window_title:
+            return
+        # Extract page title (remove browser suffix)
+        page_title = window_title
+        if page_title.endswith(_BROWSER_SUFFIXES):
+            page_title = page_title.rsplit(" - ", 1)[0]
+        logger.info("proc_title pid=%s name=%s page=%s window_title=%s", pid, name_s, page_title, window_title)
     except Exception:
+        # Title resolution is best-effort; never disturb the monitor for it
         pass
 
-    return found_title
-
 
 def monitor_processes(
     interval: float,
@@ -312,9 +764,17 @@ def monitor_processes(
     snapshot_each_interval: bool = False,
     gui_only: bool = False,
     whitelist: set | None = None,
+    fast_snapshot: bool = True,
+    shared: SharedState | None = None,
+    stop_event: threading.Event | None = None,
 ):
     """
     Monitor process starts/stops. Optionally log full snapshot each interval.
+
+    With fast_snapshot (the default), new PIDs are named via direct Win32
+    calls and create_time/username are only fetched for processes that
+    actually get logged; --slow-snapshot restores the full psutil fetch.
+    If stop_event is set, the loop exits cleanly when the event is signalled.
     """
     logger.info(
         "monitor_process_start interval=%.2fs include_system=%s snapshot_each_interval=%s",
@@ -323,6 +783,9 @@ def monitor_processes(
         snapshot_each_interval,
     )
     prev = _get_process_snapshot(include_system)
+    # All PIDs seen last interval, including system/filtered ones, so we never
+    # re-query attributes for a process we already looked at.
+    known_pids = set(psutil.pids())
     prev_windowed = _get_top_level_window_pids() if gui_only else set()
     # Cache exe paths for PIDs we learn about so proc_end can include the exe even
     # if the process has already exited by the time we handle the end event.
@@ -332,28 +795,77 @@ def monitor_processes(
     ignore_names = {n.lower() for n in DEFAULT_IGNORE_NAMES}
     whitelist = {n.lower() for n in (whitelist or set())}
     try:
-        while True:
+        while stop_event is None or not stop_event.is_set():
             time.sleep(max(0.1, float(interval)))
-            curr = _get_process_snapshot(include_system)
+            curr_pids = set(psutil.pids())
+            # Most intervals on an idle desktop see no process changes at all;
+            # when the PID set is identical there is nothing to diff or log,
+            # so skip the snapshot and window bookkeeping entirely.
+            if curr_pids == known_pids and not snapshot_each_interval:
+                continue
+            if snapshot_each_interval:
+                # Full snapshots are user-visible output; keep the complete walk
+                curr = _get_process_snapshot(include_system)
+            else:
+                # Incremental update: psutil.pids() is a single cheap syscall,
+                # so only the PIDs that are new since last interval pay for an
+                # attribute fetch. Long-lived processes keep their cached info.
+                curr = {pid: info for pid, info in prev.items() if pid in curr_pids}
+                new_pids = curr_pids - known_pids
+                fast_names = _fast_proc_names() if new_pids and fast_snapshot and not include_system else {}
+                for pid in new_pids:
+                    if fast_names:
+                        # Name only; create_time/username are filled in lazily
+                        # by the started handler if the process gets logged.
+                        name = fast_names.get(pid)
+                        if name is None or _is_system_process(pid, name, None):
+                            continue
+                        curr[pid] = (name, name.lower(), None, None)
+                        continue
+                    info = _fetch_proc_info(pid)
+                    if info is None:
+                        continue
+                    if not include_system and _is_system_process(pid, info[0], info[3]):
+                        continue
+                    curr[pid] = info
+            known_pids = curr_pids
+
+            # Publish the fresh pid -> name view for the active-app monitor
+            if shared is not None:
+                with shared.lock:
+                    shared.pid_name_map = {pid: info[0] for pid, info in curr.items()}
+
             curr_windowed = _get_top_level_window_pids() if gui_only else set()
 
             # Detect starts and stops
             started = curr.keys() - prev.keys()
             stopped = prev.keys() - curr.keys()
 
-            for pid in sorted(started):
-                name, ctime, user = curr.get(pid, (None, None, None))
-                ctime_s = datetime.fromtimestamp(ctime).strftime("%Y-%m-%d %H:%M:%S") if ctime else "?"
-                user_s = user or "?"
+            # No sorting: log ordering is carried by timestamps anyway
+            for pid in started:
+                name, name_lc, ctime, user = curr.get(pid, (None, None, None, None))
                 name_s = name or "?"
+                name_lc = name_lc or name_s.lower()
                 # Skip noisy helper processes by default to reduce log volume.
-                if name_s.lower() in ignore_names and (not whitelist or name_s.lower() not in whitelist) and not gui_only:
+                if name_lc in ignore_names and (not whitelist or name_lc not in whitelist) and not gui_only:
                     # still cache a placeholder so that any later proc_end can clear state
                     pid_exe_cache.pop(pid, None)
                     continue
 
+                # Fast-path snapshots defer create_time/username; fetch them
+                # now that we know this process is actually being logged.
+                if ctime is None and user is None:
+                    info = _fetch_proc_info(pid)
+                    if info is not None:
+                        name = name or info[0]
+                        ctime, user = info[2], info[3]
+                        curr[pid] = (name, name_lc, ctime, user)
+
+                ctime_s = datetime.fromtimestamp(ctime).strftime("%Y-%m-%d %H:%M:%S") if ctime else "?"
+                user_s = user or "?"
+
                 # For Chrome/Edge/Brave, skip child processes (only log main browser process)
-                if not _is_main_browser_process(pid, name_s):
+                if not _is_main_browser_process(pid, name_lc, ctime):
                     pid_exe_cache.pop(pid, None)
                     continue
 
@@ -373,49 +885,41 @@ def monitor_processes(
                 # If gui_only is enabled, only log if this PID currently owns a
                 # top-level window or its name is explicitly whitelisted.
                 if gui_only:
-                    if pid not in curr_windowed and name_s.lower() not in whitelist:
+                    if pid not in curr_windowed and name_lc not in whitelist:
                         continue
 
-                # For browsers, try to get the window title (often contains page info)
-                is_browser = name_s.lower() in {"chrome.exe", "msedge.exe", "brave.exe", "firefox.exe"}
+                # Log the start right away; for browsers, resolve the window
+                # title asynchronously (it needs a settling delay) and emit a
+                # follow-up proc_title event instead of blocking the loop.
+                logger.info("proc_start pid=%s name=%s exe=%s user=%s started_at=%s", pid, name_s, exe_s, user_s, ctime_s)
+                is_browser = name_lc in _BROWSER_NAMES
                 if is_browser:
-                    # Give the browser a moment to create its window
-                    time.sleep(0.5)
-                    window_title = _get_window_title_for_pid(pid)
-                    if window_title:
-                        # Extract page title (remove browser suffix)
-                        page_title = window_title
-                        for browser_suffix in [" - Google Chrome", " - Microsoft Edge", " - Brave", " - Mozilla Firefox"]:
-                            if page_title.endswith(browser_suffix):
-                                page_title = page_title[:-len(browser_suffix)]
-                                break
-                        logger.info(f"proc_start pid={pid} name={name_s} exe={exe_s} user={user_s} started_at={ctime_s} page={page_title} window_title={window_title}")
-                    else:
-                        logger.info(f"proc_start pid={pid} name={name_s} exe={exe_s} user={user_s} started_at={ctime_s}")
-                else:
-                    logger.info(f"proc_start pid={pid} name={name_s} exe={exe_s} user={user_s} started_at={ctime_s}")
+                    _title_executor.submit(_resolve_and_log_title, pid, name_s, logger)
 
-            for pid in sorted(stopped):
-                name, ctime, user = prev.get(pid, (None, None, None))
+            for pid in stopped:
+                name, name_lc, ctime, user = prev.get(pid, (None, None, None, None))
                 user_s = user or "?"
                 name_s = name or "?"
+                name_lc = name_lc or name_s.lower()
                 # For proc_end, rely on the previous windowed set: if this PID had
                 # a top-level window previously, treat it as a GUI app close. Also
                 # honor whitelist entries regardless.
                 if gui_only:
-                    if pid not in prev_windowed and name_s.lower() not in whitelist:
+                    if pid not in prev_windowed and name_lc not in whitelist:
                         # ensure we clean cached state
                         pid_exe_cache.pop(pid, None)
                         continue
 
                 # If the name is in the ignore list and we aren't whitelisting it,
                 # skip logging (but clear any cached state).
-                if name_s.lower() in ignore_names and (not whitelist or name_s.lower() not in whitelist) and not gui_only:
+                if name_lc in ignore_names and (not whitelist or name_lc not in whitelist) and not gui_only:
                     pid_exe_cache.pop(pid, None)
                     continue
 
                 # For Chrome/Edge/Brave, skip child processes (only log main browser process)
-                if not _is_main_browser_process(pid, name_s):
+                is_main = _is_main_browser_process(pid, name_lc, ctime)
+                _browser_type_cache.pop((pid, ctime), None)
+                if not is_main:
                     pid_exe_cache.pop(pid, None)
                     continue
 
@@ -430,21 +934,24 @@ def monitor_processes(
                     except (psutil.NoSuchProcess, psutil.AccessDenied, Exception):
                         exe_s = "?"
 
-                logger.info(f"proc_end pid={pid} name={name_s} exe={exe_s} user={user_s}")
+                logger.info("proc_end pid=%s name=%s exe=%s user=%s", pid, name_s, exe_s, user_s)
 
             if snapshot_each_interval:
                 # Log a compact snapshot header and then individual lines. If
                 # gui_only is set, filter snapshot entries to GUI/whitelisted procs.
                 display_items = curr.items()
                 if gui_only:
-                    display_items = ((pid, info) for pid, info in curr.items() if pid in curr_windowed or (info[0] or "").lower() in whitelist)
-                logger.info(f"proc_snapshot count={len(curr)}")
-                for pid, (name, ctime, user) in display_items:
-                    name_s = name or "?"
-                    user_s = user or "?"
-                    logger.info(f"proc pid={pid} name={name_s} user={user_s}")
+                    display_items = ((pid, info) for pid, info in curr.items() if pid in curr_windowed or info[1] in whitelist)
+                # One record for the whole snapshot: N per-process emits would
+                # mean N formatter and queue passes for what is one logical event.
+                lines = [
+                    f"proc pid={pid} name={name or '?'} user={user or '?'}"
+                    for pid, (name, name_lc, ctime, user) in display_items
+                ]
+                logger.info("proc_snapshot count=%d\n%s", len(curr), "\n".join(lines))
             prev = curr
             prev_windowed = curr_windowed
+        logger.info("monitor_process_stop reason=stop_event")
     except KeyboardInterrupt:
         logger.info("monitor_process_stop reason=keyboard_interrupt")
     except Exception as e:
@@ -467,11 +974,14 @@ def parse_args():
     parser.add_argument("--stdout", action="store_true", help="Also log to console")
     parser.add_argument("--list-once", action="store_true", help="Print all running processes once and exit")
     parser.add_argument("--no-rotate", action="store_true", help="Disable file rotation (writes to a single file)")
+    parser.add_argument("--poll", action="store_true", help="Use the legacy polling loop for active-app monitoring instead of WinEvent hooks")
+    parser.add_argument("--debounce-ms", type=float, default=float(os.getenv("AAM_DEBOUNCE_MS", 150.0)), help="Settle time in ms before logging a foreground change; 0 to disable (default: 150)")
     parser.add_argument("--heartbeat", type=float, default=float(os.getenv("AAM_HEARTBEAT", 300.0)), help="Heartbeat seconds to re-log even if unchanged; set 0 to disable")
     parser.add_argument("--mode", choices=["active", "process", "both"], default=os.getenv("AAM_MODE", "active"), help="What to monitor: foreground active app, process starts/stops, or both")
     parser.add_argument("--proc-snapshot", action="store_true", help="In process mode, also log full snapshot each interval")
     parser.add_argument("--include-system", action="store_true", help="Include system processes in process monitoring")
     parser.add_argument("--gui-only", action="store_true", help="Only log processes that own top-level visible windows (or are whitelisted)")
+    parser.add_argument("--slow-snapshot", action="store_true", help="Use the full psutil attribute fetch for new processes instead of the fast Win32 name path")
     parser.add_argument("--whitelist", type=str, default="", help="Comma-separated process names to always include (e.g., chrome.exe,Code.exe)")
     return parser.parse_args()
 
@@ -483,53 +993,50 @@ def main():
         list_processes_once()
         return
 
-    if args.no_rotate:
-        # Use a plain file handler if rotation disabled
-        logger = logging.getLogger("active_apps_monitor")
-        logger.setLevel(logging.INFO)
-        logger.handlers.clear()
-        fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
-        fh = logging.FileHandler(args.logfile, encoding="utf-8")
-        fh.setFormatter(fmt)
-        logger.addHandler(fh)
-        if args.stdout:
-            sh = logging.StreamHandler()
-            sh.setFormatter(fmt)
-            logger.addHandler(sh)
-    else:
-        logger = configure_logger(args.logfile, also_stdout=args.stdout)
+    logger, listener = configure_logger(args.logfile, also_stdout=args.stdout, rotate=not args.no_rotate)
 
     heartbeat = None if args.heartbeat and args.heartbeat <= 0 else args.heartbeat
 
     # Build whitelist set from comma-separated CLI argument
     whitelist_set = {s.strip().lower() for s in args.whitelist.split(",") if s.strip()} if getattr(args, "whitelist", None) is not None else set()
 
-    if args.mode == "active":
-        monitor_active_app(args.interval, logger, heartbeat_seconds=heartbeat)
-    elif args.mode == "process":
-        monitor_processes(
-            args.interval,
-            logger,
-            include_system=args.include_system,
-            snapshot_each_interval=bool(args.proc_snapshot),
-            gui_only=args.gui_only,
-            whitelist=whitelist_set,
-        )
-    elif args.mode == "both":
-        # Run processes in a background thread and active monitor in main thread
-        t = threading.Thread(
-            target=monitor_processes,
-            args=(args.interval, logger),
-            kwargs={
-                "include_system": args.include_system,
-                "snapshot_each_interval": bool(args.proc_snapshot),
-                "gui_only": args.gui_only,
-                "whitelist": whitelist_set,
-            },
-            daemon=True,
-        )
-        t.start()
-        monitor_active_app(args.interval, logger, heartbeat_seconds=heartbeat)
+    try:
+        if args.mode == "active":
+            monitor_active_app(args.interval, logger, heartbeat_seconds=heartbeat, poll=args.poll, debounce_ms=args.debounce_ms)
+        elif args.mode == "process":
+            monitor_processes(
+                args.interval,
+                logger,
+                include_system=args.include_system,
+                snapshot_each_interval=bool(args.proc_snapshot),
+                gui_only=args.gui_only,
+                whitelist=whitelist_set,
+                fast_snapshot=not args.slow_snapshot,
+            )
+        elif args.mode == "both":
+            # Run processes in a background thread and active monitor in main
+            # thread, sharing one pid -> name view so the foreground monitor
+            # doesn't duplicate the process monitor's psutil work.
+            shared = SharedState()
+            t = threading.Thread(
+                target=monitor_processes,
+                args=(args.interval, logger),
+                kwargs={
+                    "include_system": args.include_system,
+                    "snapshot_each_interval": bool(args.proc_snapshot),
+                    "gui_only": args.gui_only,
+                    "whitelist": whitelist_set,
+                    "fast_snapshot": not args.slow_snapshot,
+                    "shared": shared,
+                },
+                daemon=True,
+            )
+            t.start()
+            monitor_active_app(args.interval, logger, heartbeat_seconds=heartbeat, poll=args.poll, shared=shared, debounce_ms=args.debounce_ms)
+    finally:
+        # Flush queued records and stop the listener thread on shutdown
+        if listener is not None:
+            listener.stop()
 
 
 if __name__ == "__main__":